@@ -0,0 +1,139 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Iterable
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import MetricFamily, registry
+
+admission_shed_total = registry.counter(
+    "admission_shed_total",
+    "Upstream calls rejected before being sent, by reason (queue_full, deadline).",
+    ("upstream", "reason"),
+)
+admission_wait_seconds = registry.histogram(
+    "admission_wait_seconds",
+    "Time admitted calls waited for an upstream slot.",
+    ("upstream",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+class Overloaded(Exception):
+    """An upstream's admission queue is full or the wait deadline passed."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: int):
+        super().__init__(f"{upstream} overloaded ({reason})")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def as_http_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El servicio está saturado. Inténtalo de nuevo en unos segundos.",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+class AdmissionLimiter:
+    """
+    Caps concurrent calls to one upstream. Up to `max_concurrency` calls run
+    at once and up to `max_queue` more wait in FIFO order for at most
+    `queue_timeout` seconds; anything beyond that raises `Overloaded`
+    immediately, so a slow upstream turns into fast 503s instead of an
+    unbounded pile of waiting requests.
+    """
+
+    def __init__(self, upstream: str, *, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.upstream = upstream
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_time = 0.5   # EWMA seconds per call, seeds Retry-After
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1."""
+        backlog = self.active + self.queued + 1
+        return max(1, math.ceil(self._service_time * backlog / max(1, self.max_concurrency)))
+
+    def _shed(self, reason: str) -> Overloaded:
+        admission_shed_total.inc(upstream=self.upstream, reason=reason)
+        return Overloaded(self.upstream, reason, self.retry_after())
+
+    async def _acquire(self) -> None:
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # _release hands its slot over by resolving the future; `active` is not decremented in between.
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+                raise self._shed("deadline")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()   # the slot was already handed to us
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        queued_at = time.monotonic()
+        await self._acquire()
+        started = time.monotonic()
+        admission_wait_seconds.observe(started - queued_at, upstream=self.upstream)
+        try:
+            yield
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    def collect(self) -> Iterable[MetricFamily]:
+        labels = {"upstream": self.upstream}
+        yield MetricFamily("admission_in_flight", "gauge", "Upstream calls currently admitted.").add(self.active, **labels)
+        yield MetricFamily("admission_queue_depth", "gauge", "Calls waiting for an upstream slot.").add(self.queued, **labels)
+        yield MetricFamily("admission_capacity", "gauge", "Maximum concurrent upstream calls.").add(self.max_concurrency, **labels)
+
+def _limiter(upstream: str, max_concurrency: int, max_queue: int, queue_timeout: float) -> AdmissionLimiter:
+    limiter = AdmissionLimiter(upstream, max_concurrency=max_concurrency, max_queue=max_queue, queue_timeout=queue_timeout)
+    registry.register(limiter.collect)
+    return limiter
+
+# Supabase GoTrue (sign up / sign in) and OpenAI Realtime session creation
+supabase_auth_limiter = _limiter(
+    "supabase_auth",
+    settings.SUPABASE_AUTH_MAX_CONCURRENCY,
+    settings.SUPABASE_AUTH_MAX_QUEUE,
+    settings.SUPABASE_AUTH_QUEUE_TIMEOUT,
+)
+openai_limiter = _limiter(
+    "openai",
+    settings.OPENAI_MAX_CONCURRENCY,
+    settings.OPENAI_MAX_QUEUE,
+    settings.OPENAI_QUEUE_TIMEOUT,
+)
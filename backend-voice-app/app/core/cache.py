@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded LRU mapping whose entries expire at an absolute wall-clock time.
+
+    Entries use the cache-wide `ttl` unless `set()` is given an explicit
+    `expires_at` (epoch seconds), e.g. the `exp` claim of a JWT. The cache is
+    meant to be used from the event loop; it does no locking of its own.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.peek(key) is not None
+
+    def _expiry(self, ttl: Optional[float], expires_at: Optional[float]) -> float:
+        if expires_at is not None:
+            return expires_at
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl is not None else float("inf")
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: K) -> Optional[V]:
+        """Like `get` but without touching recency or the hit/miss counters."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def set(
+        self,
+        key: K,
+        value: V,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (self._expiry(ttl, expires_at), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> Optional[V]:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
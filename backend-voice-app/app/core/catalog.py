@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.etag import make_etag
+from app.models.topic import TopicRead
+
+logger = logging.getLogger(__name__)
+
+_topics_adapter = TypeAdapter(List[TopicRead])
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """An immutable, already validated and serialized copy of the topics table."""
+    topics: List[TopicRead]
+    by_id: Dict[int, TopicRead]
+    json_rows: Dict[int, dict]
+    body: bytes
+    etag: str
+    loaded_at: float = field(default_factory=time.time)
+
+class TopicCatalog:
+    """
+    In-process cache of the `topics` table.
+
+    The catalog is loaded once, kept pre-serialized together with its ETag and
+    refreshed when the TTL expires or `invalidate()` is called. If a refresh
+    fails the previous snapshot keeps being served and the reload is retried
+    after `retry_after` seconds.
+    """
+
+    def __init__(self, ttl: float, retry_after: float = 5.0):
+        self._ttl = ttl
+        self._retry_after = retry_after
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def _fresh(self) -> Optional[CatalogSnapshot]:
+        if self._snapshot is not None and time.monotonic() < self._expires_at:
+            return self._snapshot
+        return None
+
+    async def get(self, supabase) -> CatalogSnapshot:
+        snapshot = self._fresh()
+        if snapshot is not None:
+            return snapshot
+        # Only one coroutine reloads; the rest wait and reuse its result.
+        async with self._lock:
+            snapshot = self._fresh()
+            if snapshot is not None:
+                return snapshot
+            try:
+                return await self._load(supabase)
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                logger.warning("topic catalog reload failed; serving the previous snapshot", exc_info=True)
+                self._expires_at = time.monotonic() + self._retry_after
+                return self._snapshot
+
+    async def _load(self, supabase) -> CatalogSnapshot:
+        res = await supabase.table("topics").select("*").order("id").execute()
+        topics = _topics_adapter.validate_python(res.data or [])
+        body = _topics_adapter.dump_json(topics)
+        snapshot = CatalogSnapshot(
+            topics=topics,
+            by_id={topic.id: topic for topic in topics},
+            json_rows={topic.id: topic.model_dump(mode="json") for topic in topics},
+            body=body,
+            etag=make_etag(body),
+        )
+        self._snapshot = snapshot
+        self._expires_at = time.monotonic() + self._ttl
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Force a reload on the next read. The stale copy stays as a fallback."""
+        self._expires_at = 0.0
+
+topic_catalog = TopicCatalog(ttl=settings.TOPIC_CATALOG_TTL)
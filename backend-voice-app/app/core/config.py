@@ -1,4 +1,5 @@
 
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -6,6 +7,137 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     SUPABASE_JWT_SECRET: str
 
+    # Pooled HTTP connection shared by every Supabase call (PostgREST + auth)
+    SUPABASE_MAX_CONNECTIONS: int = 50
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_TIMEOUT: float = 10.0
+
+    # Admission control for Supabase auth calls (sign up / login): at most MAX_CONCURRENCY
+    # in flight, MAX_QUEUE waiting up to QUEUE_TIMEOUT seconds, the rest get 503 + Retry-After
+    SUPABASE_AUTH_MAX_CONCURRENCY: int = 20
+    SUPABASE_AUTH_MAX_QUEUE: int = 100
+    SUPABASE_AUTH_QUEUE_TIMEOUT: float = 2.0
+
+    # Shared keep-alive client for api.openai.com (HTTP/2 needs the optional `h2` package)
+    OPENAI_API_KEY: Optional[str] = None
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OPENAI_HTTP2: bool = True
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENAI_KEEPALIVE_EXPIRY: float = 60.0
+    OPENAI_CONNECT_TIMEOUT: float = 5.0
+    OPENAI_READ_TIMEOUT: float = 15.0
+
+    # Admission control for Realtime session creation, same semantics as SUPABASE_AUTH_*
+    OPENAI_MAX_CONCURRENCY: int = 20
+    OPENAI_MAX_QUEUE: int = 50
+    OPENAI_QUEUE_TIMEOUT: float = 2.0
+
+    # Realtime session creation: retries of transport errors/408/429/5xx with jittered
+    # backoff, a hedged second attempt once the first is slower than the observed quantile,
+    # and a circuit breaker that fails fast after sustained failures
+    OPENAI_MAX_ATTEMPTS: int = 3
+    OPENAI_RETRY_BACKOFF_BASE: float = 0.2
+    OPENAI_RETRY_BACKOFF_MAX: float = 2.0
+    OPENAI_HEDGE_ENABLED: bool = True
+    OPENAI_HEDGE_QUANTILE: float = 0.95
+    OPENAI_HEDGE_MIN_DELAY: float = 0.5
+    OPENAI_HEDGE_MAX_DELAY: float = 5.0
+    OPENAI_BREAKER_WINDOW: int = 20
+    OPENAI_BREAKER_MIN_CALLS: int = 10
+    OPENAI_BREAKER_FAILURE_RATIO: float = 0.5
+    OPENAI_BREAKER_RESET_TIMEOUT: float = 30.0
+
+    # Warm pool of pre-minted Realtime sessions for the most requested topics
+    OPENAI_SESSION_POOL_ENABLED: bool = False
+    OPENAI_SESSION_POOL_MAX_TOPICS: int = 5
+    OPENAI_SESSION_POOL_MAX_PER_TOPIC: int = 4
+    OPENAI_SESSION_POOL_MIN_RATE: float = 0.05  # requests/second before a topic is kept warm
+    OPENAI_SESSION_POOL_EXPIRY_MARGIN: float = 15.0
+    OPENAI_SESSION_POOL_REFILL_INTERVAL: float = 1.0
+
+    # Seconds a successful ephemeral key is reused for identical retries from the same user
+    OPENAI_EPHEMERAL_KEY_GRACE: float = 2.0
+
+    # Per-user profile rows behind GET /profile/me
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL: float = 300.0
+
+    # Per-user set of completed topic ids behind GET /topics/completed
+    COMPLETED_TOPICS_CACHE_SIZE: int = 10000
+    COMPLETED_TOPICS_CACHE_TTL: float = 600.0
+
+    # Largest page GET /progress serves when the client paginates
+    PROGRESS_PAGE_MAX_LIMIT: int = 100
+
+    # Rows fetched per round trip by GET /progress/export; at most two pages are held in memory
+    PROGRESS_EXPORT_PAGE_SIZE: int = 500
+
+    # Upper bound on POST /progress/batch size
+    PROGRESS_BATCH_MAX_ITEMS: int = 100
+
+    # Write-behind mode for POST /progress: rows are committed to a local SQLite
+    # spool, acknowledged with 202 and flushed upstream in the background
+    PROGRESS_WRITE_BEHIND: bool = False
+    PROGRESS_SPOOL_PATH: str = "progress_spool.sqlite3"
+    PROGRESS_SPOOL_BATCH_SIZE: int = 100
+    PROGRESS_SPOOL_FLUSH_INTERVAL: float = 1.0
+    PROGRESS_SPOOL_MAX_BACKOFF: float = 60.0
+    PROGRESS_SPOOL_MAX_ATTEMPTS: int = 10
+
+    # Per-user views folded from progress_logs (summary, ...); reads re-check the DB for
+    # rows written by other workers at most every PROGRESS_VIEW_SYNC_INTERVAL seconds,
+    # re-reading the last PROGRESS_VIEW_SYNC_OVERLAP ids to catch rows committed out of id order
+    PROGRESS_VIEW_CACHE_SIZE: int = 5000
+    PROGRESS_VIEW_CACHE_TTL: float = 3600.0
+    PROGRESS_VIEW_SYNC_INTERVAL: float = 5.0
+    PROGRESS_VIEW_SYNC_OVERLAP: int = 1000
+    PROGRESS_LEVEL_HISTORY_SIZE: int = 20
+
+    # Spaced repetition behind GET /review/next: an item marked needs_review is due again after
+    # the base interval, every other sighting doubles its interval up to the maximum
+    REVIEW_BASE_INTERVAL_DAYS: float = 1.0
+    REVIEW_MAX_INTERVAL_DAYS: float = 60.0
+
+    # Trust rows that come from our own database (or were validated on the way in)
+    # and encode them directly, skipping FastAPI's response_model re-validation
+    FAST_JSON_RESPONSES: bool = False
+
+    # Event-loop lag watchdog: stalls longer than the threshold have the loop thread's
+    # stack sampled and are reported per route/call site on /metrics and /debug/loop-stalls
+    LOOP_WATCHDOG_ENABLED: bool = False
+    LOOP_WATCHDOG_INTERVAL: float = 0.1
+    LOOP_WATCHDOG_THRESHOLD: float = 0.1
+    LOOP_WATCHDOG_MAX_RECENT: int = 100
+
+    # Structured logs for the "app" logger hierarchy, written by a background thread.
+    # DEBUG records are sampled at LOG_DEBUG_SAMPLE_RATE; when the queue is full records are dropped, never waited on
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Verified JWTs kept in memory so repeat requests skip signature checks
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+
+    # Profile rows for new accounts are created in the background after signup, retried
+    # with jittered backoff; anything still missing is created on the first GET /profile/me
+    PROFILE_PROVISION_MAX_ATTEMPTS: int = 5
+    PROFILE_PROVISION_BACKOFF_BASE: float = 0.5
+    PROFILE_PROVISION_BACKOFF_MAX: float = 10.0
+
+    # Shared secret for the X-Admin-Key header on maintenance endpoints; unset disables them
+    ADMIN_API_KEY: Optional[str] = None
+
+    # Seconds the in-process topic catalog is served before it is reloaded
+    TOPIC_CATALOG_TTL: float = 300.0
+
+    # Before /health/ready reports ready, open the Supabase and OpenAI connections and load
+    # the topic catalog and its encoded prompts, giving up after PREWARM_TIMEOUT seconds
+    PREWARM_ENABLED: bool = False
+    PREWARM_TIMEOUT: float = 10.0
+
     model_config = SettingsConfigDict(env_file='.env', case_sensitive=True, extra='ignore')
 
 settings = Settings()
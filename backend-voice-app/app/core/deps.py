@@ -1,29 +1,53 @@
 
-from fastapi import Depends, HTTPException, status
+import hashlib
+import secrets
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import register_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Verified claims keyed by SHA-256 of the raw token; each entry expires at the token's `exp`.
+token_cache: TTLCache[bytes, dict] = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+register_cache("auth_token", token_cache)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    print("TOKEN:", token)
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.SUPABASE_JWT_SECRET, 
-            algorithms=["HS256"], 
-            options={"verify_aud": False}
-        )
-        user_id: str = payload.get("sub")
-        print("PAYLOAD:", payload)
-        if user_id is None:
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(cache_key)
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token, 
+                settings.SUPABASE_JWT_SECRET, 
+                algorithms=["HS256"], 
+                options={"verify_aud": False}
+            )
+        except JWTError:
+            raise credentials_exception
+        if payload.get("sub") is None:
             raise credentials_exception
-        return {"user_id": user_id, "payload": payload}
-    except JWTError:
-        raise credentials_exception
+        # Tokens without `exp` are never cached: there is no safe point to drop them.
+        if isinstance(payload.get("exp"), (int, float)):
+            token_cache.set(cache_key, payload, expires_at=float(payload["exp"]))
+    return {"user_id": payload["sub"], "payload": payload}
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """
+    Guard for maintenance endpoints. They are disabled unless ADMIN_API_KEY is set.
+    """
+    if not settings.ADMIN_API_KEY or not x_admin_key or not secrets.compare_digest(
+        x_admin_key, settings.ADMIN_API_KEY
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acceso no autorizado."
+        )
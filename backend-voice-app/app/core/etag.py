@@ -0,0 +1,40 @@
+import hashlib
+from typing import Mapping, Optional
+
+from fastapi import Response, status
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact bytes sent to the client."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against an ETag using the weak comparison
+    RFC 9110 prescribes for GET/HEAD.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == opaque:
+            return True
+    return False
+
+def etag_response(
+    body: bytes,
+    etag: str,
+    if_none_match: Optional[str],
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Return the pre-serialized JSON body with its ETag, or an empty 304 when the
+    client already holds this exact representation.
+    """
+    response_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if headers:
+        response_headers.update(headers)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=response_headers)
+    return Response(content=body, media_type="application/json", headers=response_headers)
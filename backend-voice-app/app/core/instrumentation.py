@@ -0,0 +1,127 @@
+import sys
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.metrics import registry
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests handled, by route template and status.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."
+)
+upstream_request_duration = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to Supabase and OpenAI until response headers, by outcome.",
+    ("upstream", "operation", "outcome"),
+)
+upstream_errors_total = registry.counter(
+    "upstream_errors_total",
+    "Failed upstream calls: transport errors and 5xx responses.",
+    ("upstream", "operation", "kind"),
+)
+
+# Scope of every request in flight, keyed by id() of its MetricsMiddleware frame. The
+# loop watchdog matches these against a sampled stack to name the route that stalled.
+active_requests: Dict[int, dict] = {}
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no BaseHTTPMiddleware task overhead) recording
+    latency, status and in-flight count per route template. Paths that do not
+    match a route share the "unmatched" label so scanners cannot blow up the
+    series count.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        frame_id = id(sys._getframe())
+        active_requests[frame_id] = scope
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            del active_requests[frame_id]
+            template = route_template(scope)
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - start, method=method, route=template)
+            http_requests_total.inc(method=method, route=template, status=str(status_code))
+
+
+def route_template(scope) -> str:
+    # Newer FastAPI releases resolve included routers lazily and leave the
+    # un-prefixed route in scope["route"]; the prefixed path lives on the
+    # effective route context instead.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    template = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return template or "unmatched"
+
+
+def supabase_operation(request: httpx.Request) -> str:
+    """'/rest/v1/progress_logs' -> 'rest:progress_logs', '/auth/v1/token' -> 'auth:token'."""
+    parts = [part for part in request.url.path.split("/") if part]
+    if parts[:3] == ["rest", "v1", "rpc"] and len(parts) > 3:
+        return f"rpc:{parts[3]}"
+    if len(parts) >= 3 and parts[1] == "v1":
+        return f"{parts[0]}:{parts[2]}"
+    return "other"
+
+def openai_operation(request: httpx.Request) -> str:
+    """'/v1/realtime/sessions' -> 'realtime/sessions'."""
+    parts = [part for part in request.url.path.split("/") if part]
+    return "/".join(parts[1:]) if parts and parts[0] == "v1" else "/".join(parts) or "other"
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Wrap an httpx transport to time every outbound call, so all Supabase or
+    OpenAI traffic is measured without touching the call sites.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, upstream: str, operation=None):
+        self._transport = transport
+        self._upstream = upstream
+        self._operation = operation or (lambda request: "other")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = f"{request.method} {self._operation(request)}"
+        start = time.perf_counter()
+        kind: Optional[str] = None
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as e:
+            kind = type(e).__name__
+            raise
+        else:
+            if response.status_code >= 500:
+                kind = f"http_{response.status_code}"
+            return response
+        finally:
+            outcome = "error" if kind else "ok"
+            upstream_request_duration.observe(
+                time.perf_counter() - start, upstream=self._upstream, operation=operation, outcome=outcome
+            )
+            if kind:
+                upstream_errors_total.inc(upstream=self._upstream, operation=operation, kind=kind)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
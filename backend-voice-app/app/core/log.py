@@ -0,0 +1,201 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.metrics import registry
+
+# Everything under the "app" logger (logging.getLogger(__name__) in app modules)
+# goes through the queue; uvicorn's own loggers are left as uvicorn configures them.
+APP_LOGGER = "app"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+log_records_dropped = registry.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."
+)
+log_records_sampled_out = registry.counter(
+    "log_records_sampled_out_total", "Debug log records skipped by sampling.", ("logger",)
+)
+
+# Attributes every LogRecord has; anything else came in through `extra=`.
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id", "sample_rate"}
+
+REDACTED = "[REDACTED]"
+_SENSITIVE_KEY = re.compile(r"token|secret|password|authorization|api[_-]?key|client_secret|jwt", re.IGNORECASE)
+_SENSITIVE_VALUE = re.compile(
+    r"eyJ[\w-]+\.[\w-]+\.[\w-]*"             # JWTs
+    r"|(?<=Bearer )[\w.~+/=-]+"               # Authorization header values
+    r"|\b(?:sk|ek|rk)[-_][\w-]{8,}"           # OpenAI API and ephemeral keys
+)
+
+def redact(value: Any, key: str = "") -> Any:
+    """Mask secrets by key name (token, password, ...) and by shape (JWTs, bearer and API keys)."""
+    if key and _SENSITIVE_KEY.search(key):
+        return REDACTED
+    if isinstance(value, str):
+        return _SENSITIVE_VALUE.sub(REDACTED, value)
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [redact(v) for v in value]
+    return value
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None:
+            entry["sample_rate"] = sample_rate
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = redact(value, key)
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development, with the same redaction."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        extras = {k: redact(v, k) for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_")}
+        line = redact(super().format(record))
+        return f"{line} {extras}" if extras else line
+
+class _ContextFilter(logging.Filter):
+    """
+    Runs on the calling task, before the record crosses threads: stamps the
+    request id and applies debug sampling. Records can set their own rate
+    with `extra={"sample_rate": 0.1}`.
+    """
+
+    def __init__(self, debug_sample_rate: float):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        if rate is None and record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            rate = record.sample_rate = self.debug_sample_rate
+        if rate is not None and rate < 1.0 and random.random() >= rate:
+            log_records_sampled_out.inc(logger=record.name)
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without formatting them first and
+    drops them (counted) instead of blocking when the queue is full.
+    Messages are formatted in the writer thread, so log arguments should
+    not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level: str = "INFO", fmt: str = "json", debug_sample_rate: float = 1.0, queue_size: int = 10000) -> None:
+    """Attach the queue handler to the "app" logger and start the writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(TextFormatter() if fmt == "text" else JSONFormatter())
+    handler = _NonBlockingQueueHandler(records)
+    handler.addFilter(_ContextFilter(debug_sample_rate))
+
+    logger = logging.getLogger(APP_LOGGER)
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, writer)
+    _listener.start()
+
+def shutdown_logging() -> None:
+    """Stop the writer thread after it has flushed everything already queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+_REQUEST_ID = re.compile(r"[A-Za-z0-9_.:-]{1,128}")
+
+class RequestIdMiddleware:
+    """
+    Gives every request a correlation id: the caller's X-Request-ID when it
+    looks sane, otherwise a new one. It is echoed in the response header and
+    attached to every log record emitted while handling the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = incoming if incoming and _REQUEST_ID.fullmatch(incoming) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "%s %s -> %s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={"duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+                )
+            request_id_var.reset(token)
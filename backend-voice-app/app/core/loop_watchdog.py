@@ -0,0 +1,212 @@
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.instrumentation import active_requests, route_template
+from app.core.metrics import registry
+
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the watchdog asked to be woken up and when the event loop ran it.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+event_loop_stalls_total = registry.counter(
+    "event_loop_stalls_total",
+    "Event loop stalls longer than the watchdog threshold, by route and app call site.",
+    ("route", "site"),
+)
+event_loop_stall_seconds_total = registry.counter(
+    "event_loop_stall_seconds_total",
+    "Time the event loop spent blocked in stalls, by route and app call site.",
+    ("route", "site"),
+)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_STACK_DEPTH = 30
+
+@dataclass
+class _Stall:
+    started: float            # monotonic time the loop was due to wake the watchdog
+    wall_time: float
+    route: str
+    site: str
+    stack: List[str]
+    duration: Optional[float] = None
+
+@dataclass
+class _SiteStats:
+    route: str
+    site: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_seen: float = 0.0
+    stack: List[str] = field(default_factory=list)
+
+class LoopWatchdog:
+    """
+    Measures event-loop scheduling lag and attributes stalls to their cause.
+
+    An asyncio task sleeps for `interval` and records how late it woke up
+    (`event_loop_lag_seconds`). Its next due time is watched by a daemon
+    thread, which is the only thing still running while the loop is blocked:
+    once the wake-up is `threshold` seconds overdue the thread samples the
+    loop thread's stack, and reports the innermost frame in app code as the
+    call site and, as the route, the request MetricsMiddleware registered
+    for one of the stack's frames. The sampler only looks at frame identity
+    and code objects, never at another thread's locals. The stall's
+    duration is filled in when the loop wakes again.
+    """
+
+    def __init__(self, *, interval: float, threshold: float, max_recent: int = 100):
+        self.interval = interval
+        self.threshold = threshold
+        self._recent: Deque[_Stall] = deque(maxlen=max_recent)
+        self._sites: Dict[Tuple[str, str], _SiteStats] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[_Stall] = None
+        self._due = time.monotonic()
+        self._max_lag = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._due = time.monotonic() + self.interval
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+        self._thread = threading.Thread(target=self._sample_loop, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    async def _run(self) -> None:
+        while True:
+            with self._lock:
+                due = self._due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - due)
+            event_loop_lag.observe(lag)
+            with self._lock:
+                self._due = math.inf
+                self._max_lag = max(self._max_lag, lag)
+                stall, self._pending = self._pending, None
+            if stall is not None:
+                self._finish(stall, now - stall.started)
+
+    def _finish(self, stall: _Stall, duration: float) -> None:
+        stall.duration = duration
+        event_loop_stalls_total.inc(route=stall.route, site=stall.site)
+        event_loop_stall_seconds_total.inc(duration, route=stall.route, site=stall.site)
+        with self._lock:
+            self._recent.append(stall)
+            stats = self._sites.get((stall.route, stall.site))
+            if stats is None:
+                stats = self._sites[(stall.route, stall.site)] = _SiteStats(stall.route, stall.site)
+            stats.count += 1
+            stats.total_seconds += duration
+            stats.max_seconds = max(stats.max_seconds, duration)
+            stats.last_seen = stall.wall_time
+            stats.stack = stall.stack
+
+    def _sample_loop(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stopping.wait(poll):
+            with self._lock:
+                due = self._due
+                if self._pending is not None or time.monotonic() - due < self.threshold:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stall = self._describe(frame, due)
+            with self._lock:
+                # The loop may have caught up while the stack was being walked
+                if self._due == due and self._pending is None:
+                    self._pending = stall
+
+    def _describe(self, frame, due: float) -> _Stall:
+        site = "unknown"
+        route = "none"
+        stack = []
+        current = frame
+        while current is not None:
+            code = current.f_code
+            if site == "unknown" and code.co_filename.startswith(_APP_DIR) and code.co_filename != __file__:
+                site = f"{os.path.relpath(code.co_filename, os.path.dirname(_APP_DIR))}:{current.f_lineno} {code.co_name}"
+            scope = active_requests.get(id(current)) if route == "none" else None
+            if scope is not None:
+                route = route_template(scope)
+            current = current.f_back
+        for entry in traceback.extract_stack(frame, limit=_STACK_DEPTH):
+            stack.append(f"{entry.filename}:{entry.lineno} in {entry.name}")
+        return _Stall(started=due, wall_time=time.time(), route=route, site=site, stack=stack)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            sites = sorted(self._sites.values(), key=lambda s: s.total_seconds, reverse=True)
+            recent = list(self._recent)
+            max_lag = self._max_lag
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "max_lag_seconds": max_lag,
+            "sites": [
+                {
+                    "route": s.route,
+                    "site": s.site,
+                    "count": s.count,
+                    "total_seconds": s.total_seconds,
+                    "max_seconds": s.max_seconds,
+                    "last_seen": s.last_seen,
+                    "stack": s.stack,
+                }
+                for s in sites
+            ],
+            "recent": [
+                {"route": s.route, "site": s.site, "seconds": s.duration, "at": s.wall_time}
+                for s in reversed(recent)
+            ],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._sites.clear()
+            self._max_lag = 0.0
+
+
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL,
+    threshold=settings.LOOP_WATCHDOG_THRESHOLD,
+    max_recent=settings.LOOP_WATCHDOG_MAX_RECENT,
+)
@@ -0,0 +1,175 @@
+import bisect
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + inner + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+@dataclass
+class MetricFamily:
+    """A rendered metric: one HELP/TYPE header and its samples."""
+    name: str
+    type: str
+    help: str
+    samples: List[Tuple[str, Mapping[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, suffix: str = "", **labels: str) -> "MetricFamily":
+        self.samples.append((suffix, labels, value))
+        return self
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def _key(self, labels: Mapping[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> Iterable[MetricFamily]:
+        family = MetricFamily(self.name, self.type, self.help)
+        for key, value in self._values.items():
+            family.add(value, **dict(zip(self.labelnames, key)))
+        yield family
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+# Seconds; tuned for API handlers and upstream HTTP calls (5 ms .. 30 s).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram(_Metric):
+    """
+    Cumulative histogram. `observe()` is a bisect plus two additions, cheap
+    enough to run on every request.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # one counter per bucket, +Inf, then the running sum
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Iterable[MetricFamily]:
+        family = MetricFamily(self.name, self.type, self.help)
+        for key, series in self._series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                family.add(cumulative, "_bucket", **labels, le=_format_value(bound))
+            family.add(cumulative, "_count", **labels)
+            family.add(series[-1], "_sum", **labels)
+        yield family
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+class Registry:
+    """
+    Process-wide set of metrics rendered in the Prometheus text exposition
+    format. Components either create metrics through `counter()`/`gauge()` or
+    register a collector that reports their own internal counters on scrape.
+    """
+
+    def __init__(self):
+        self._collectors: List[Collector] = []
+
+    def register(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self.register(metric.collect)
+        return metric
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, help, labelnames)
+        self.register(metric.collect)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self.register(metric.collect)
+        return metric
+
+    def render(self) -> str:
+        # Families with the same name (e.g. one per cache) are merged so each
+        # name gets a single HELP/TYPE header, as the exposition format requires.
+        families: Dict[str, MetricFamily] = {}
+        for collector in self._collectors:
+            for family in collector():
+                merged = families.get(family.name)
+                if merged is None:
+                    families[family.name] = MetricFamily(family.name, family.type, family.help, list(family.samples))
+                else:
+                    merged.samples.extend(family.samples)
+        lines: List[str] = []
+        for family in families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for suffix, labels, value in family.samples:
+                lines.append(f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def register_cache(name: str, cache) -> None:
+    """Expose the hit/miss/eviction counters of a TTLCache under `cache=<name>`."""
+    def collect() -> Iterable[MetricFamily]:
+        stats = cache.stats()
+        yield MetricFamily("cache_entries", "gauge", "Entries currently held by the cache.").add(stats["size"], cache=name)
+        yield MetricFamily("cache_capacity", "gauge", "Maximum number of entries of the cache.").add(stats["maxsize"], cache=name)
+        for event in ("hits", "misses", "evictions", "expirations"):
+            yield MetricFamily(
+                f"cache_{event}_total", "counter", f"Cache {event} since process start."
+            ).add(stats[event], cache=name)
+    registry.register(collect)
@@ -0,0 +1,59 @@
+import importlib.util
+from typing import Optional
+
+import httpx
+from app.core.config import settings
+from app.core.instrumentation import InstrumentedTransport, openai_operation
+
+openai_client: Optional[httpx.AsyncClient] = None
+
+def _http2_available() -> bool:
+    # HTTP/2 needs the optional `h2` package (pip install "httpx[http2]").
+    return settings.OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+
+def build_openai_client(**overrides) -> httpx.AsyncClient:
+    """
+    Build the keep-alive client used for every outbound OpenAI call.
+    `overrides` are passed to httpx.AsyncClient (benchmarks point it at a local fake).
+    """
+    options = dict(
+        base_url=settings.OPENAI_BASE_URL,
+        headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+        timeout=httpx.Timeout(
+            connect=settings.OPENAI_CONNECT_TIMEOUT,
+            read=settings.OPENAI_READ_TIMEOUT,
+            write=settings.OPENAI_CONNECT_TIMEOUT,
+            pool=settings.OPENAI_CONNECT_TIMEOUT,
+        ),
+    )
+    options.update(overrides)
+    # Pool limits and HTTP/2 belong to the transport once we wrap it for metrics.
+    transport = httpx.AsyncHTTPTransport(
+        http2=_http2_available(),
+        verify=options.pop("verify", True),
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+        ),
+    )
+    options.setdefault("transport", InstrumentedTransport(transport, "openai", openai_operation))
+    return httpx.AsyncClient(**options)
+
+async def init_openai_client() -> httpx.AsyncClient:
+    """Create the shared OpenAI client. Called once from the application lifespan."""
+    global openai_client
+    if openai_client is None:
+        openai_client = build_openai_client()
+    return openai_client
+
+async def close_openai_client() -> None:
+    global openai_client
+    if openai_client is not None:
+        await openai_client.aclose()
+    openai_client = None
+
+def get_openai_client() -> httpx.AsyncClient:
+    if openai_client is None:
+        raise RuntimeError("OpenAI client is not initialised; is the app lifespan running?")
+    return openai_client
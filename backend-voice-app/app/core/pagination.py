@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+Cursor = Tuple[str, int]
+
+def encode_cursor(session_date: str, row_id: int) -> str:
+    """Opaque keyset cursor pointing just past the row (session_date, id)."""
+    raw = json.dumps([session_date, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of encode_cursor. Raises ValueError on anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        session_date, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(session_date, str) or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("Invalid cursor")
+    # The value ends up inside a PostgREST filter expression: only a real timestamp,
+    # re-serialized by us, may go there (no quotes, commas or parentheses from the client).
+    try:
+        session_date = datetime.fromisoformat(session_date).isoformat()
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+    return session_date, row_id
+
+def after_cursor(query, cursor: Cursor):
+    """
+    Restrict a query ordered by (session_date DESC, id DESC) to the rows after
+    `cursor`. Uses the same index as the ORDER BY, so every page costs the same.
+    """
+    session_date, row_id = cursor
+    return query.or_(
+        f'session_date.lt."{session_date}",'
+        f'and(session_date.eq."{session_date}",id.lt.{row_id})'
+    )
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import random
+from typing import Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import MetricFamily, registry
+from app.core.supabase import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+async def ensure_profile(supabase, user_id: str, access_token: Optional[str] = None) -> Optional[dict]:
+    """
+    Create the user's `profiles` row if it is missing and return it.
+
+    Idempotent: an existing row is left untouched (ON CONFLICT DO NOTHING)
+    and read back instead. With `access_token` the write runs as the user,
+    so row-level security sees the same identity as a request of theirs.
+    """
+    query = supabase.table("profiles").upsert({"id": user_id}, on_conflict="id", ignore_duplicates=True)
+    if access_token:
+        query.request.headers["Authorization"] = f"Bearer {access_token}"
+    res = await query.execute()
+    if res.data:
+        return res.data[0]
+    # Someone else created it first
+    query = supabase.table("profiles").select("*").eq("id", user_id).limit(1)
+    if access_token:
+        query.request.headers["Authorization"] = f"Bearer {access_token}"
+    res = await query.execute()
+    return res.data[0] if res.data else None
+
+class ProfileProvisioner:
+    """
+    Creates `profiles` rows for new accounts off the signup request path.
+
+    Each scheduled user gets a task that retries `ensure_profile` with
+    full-jitter backoff, up to `max_attempts` times. Rows that still could
+    not be written (or tasks lost when the process dies) are created on the
+    user's first GET /profile/me, so every account ends up with a profile.
+    """
+
+    def __init__(self, *, max_attempts: int, backoff_base: float, backoff_max: float):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.created = 0
+        self.retries = 0
+        self.failed = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def schedule(self, user_id: str, access_token: Optional[str] = None) -> asyncio.Task:
+        task = asyncio.create_task(self._provision(user_id, access_token))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _provision(self, user_id: str, access_token: Optional[str]) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await ensure_profile(get_supabase_client(), user_id, access_token)
+                self.created += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    break
+                self.retries += 1
+                logger.warning("profile creation failed (attempt %d): %s", attempt, e, extra={"user_id": user_id})
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+        self.failed += 1
+        logger.error(
+            "profile creation gave up after %d attempts; it will be created on first read",
+            self.max_attempts,
+            extra={"user_id": user_id},
+        )
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Give in-flight provisioning `timeout` seconds to finish, then cancel it."""
+        if not self._tasks:
+            return
+        tasks = set(self._tasks)
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def collect(self):
+        yield MetricFamily("profile_provisioning_pending", "gauge", "Profile rows still being created in the background.").add(self.pending)
+        yield MetricFamily("profile_provisioning_created_total", "counter", "Profile rows created after signup.").add(self.created)
+        yield MetricFamily("profile_provisioning_retries_total", "counter", "Profile creation attempts that failed and were retried.").add(self.retries)
+        yield MetricFamily("profile_provisioning_failed_total", "counter", "Profiles left to be created on first read.").add(self.failed)
+
+profile_provisioner = ProfileProvisioner(
+    max_attempts=settings.PROFILE_PROVISION_MAX_ATTEMPTS,
+    backoff_base=settings.PROFILE_PROVISION_BACKOFF_BASE,
+    backoff_max=settings.PROFILE_PROVISION_BACKOFF_MAX,
+)
+registry.register(profile_provisioner.collect)
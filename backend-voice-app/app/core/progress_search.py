@@ -0,0 +1,136 @@
+import bisect
+import heapq
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.progress_summary import normalize_term
+from app.core.progress_views import ProgressView, ProgressViewStore, parse_timestamp
+
+VOCABULARY, GRAMMAR_POINT, EXAMPLE = "vocabulary", "grammar_point", "example"
+
+_WORD = re.compile(r"[^\W_]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free word tokens: "Past Perfect, I'd gone" -> ["past", "perfect", "i", "d", "gone"]."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD.findall(stripped)
+
+TermKey = Tuple[str, str]
+
+class _Term:
+    """One distinct word, grammar point or example sentence and the sessions it appeared in."""
+
+    __slots__ = ("kind", "text", "grammar_point", "tokens", "sessions", "last_session_date")
+
+    def __init__(self, kind: str, text: str, tokens: FrozenSet[str]):
+        self.kind = kind
+        self.text = text
+        self.grammar_point: Optional[str] = None
+        self.tokens = tokens
+        self.sessions: Dict[int, datetime] = {}
+        self.last_session_date: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        sessions = sorted(self.sessions.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return {
+            "kind": self.kind,
+            "text": self.text,
+            "grammar_point": self.grammar_point,
+            "last_session_date": self.last_session_date,
+            "sessions": [{"id": row_id, "session_date": session_date} for row_id, session_date in sessions],
+        }
+
+class ProgressSearchView(ProgressView):
+    """
+    Inverted index over a user's vocabulary, grammar points and their
+    examples. Each distinct term is indexed once by its normalized tokens;
+    the sorted token list makes every query token a prefix match found by
+    binary search.
+    """
+
+    columns = "id,session_date,new_vocabulary,grammar_points"
+
+    def __init__(self):
+        super().__init__()
+        self._terms: Dict[TermKey, _Term] = {}
+        self._postings: Dict[str, Set[TermKey]] = {}
+        self._tokens: List[str] = []
+
+    def _add(self, kind: str, text: str, row_id: int, session_date: datetime) -> Optional[_Term]:
+        """Index one occurrence; returns the term when this is now its most recent one."""
+        key = (kind, normalize_term(text))
+        term = self._terms.get(key)
+        if term is None:
+            tokens = frozenset(tokenize(text))
+            if not tokens:
+                return None
+            term = self._terms[key] = _Term(kind, text.strip(), tokens)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    bisect.insort(self._tokens, token)
+                postings.add(key)
+        term.sessions[row_id] = session_date
+        if term.last_session_date is None or session_date >= term.last_session_date:
+            term.last_session_date = session_date
+            term.text = text.strip()  # show the most recent spelling
+            return term
+        return None
+
+    def apply(self, row: dict) -> None:
+        row_id = row.get("id")
+        if not isinstance(row_id, int):
+            return
+        session_date = parse_timestamp(row["session_date"])
+        for word in row.get("new_vocabulary") or []:
+            self._add(VOCABULARY, word, row_id, session_date)
+        for grammar_point in row.get("grammar_points") or []:
+            point = grammar_point.get("point") or ""
+            self._add(GRAMMAR_POINT, point, row_id, session_date)
+            for example in grammar_point.get("examples") or []:
+                term = self._add(EXAMPLE, example, row_id, session_date)
+                if term is not None:
+                    term.grammar_point = point.strip() or None
+
+    def _matching(self, prefix: str) -> Set[TermKey]:
+        matched: Set[TermKey] = set()
+        index = bisect.bisect_left(self._tokens, prefix)
+        while index < len(self._tokens) and self._tokens[index].startswith(prefix):
+            matched |= self._postings[self._tokens[index]]
+            index += 1
+        return matched
+
+    def search(self, query: str, limit: int) -> Tuple[int, List[dict]]:
+        """
+        Terms containing every query token as a word prefix, terms matching
+        every token exactly first, then the most recently practiced. Returns
+        the total number of matches and the top `limit`.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return 0, []
+        candidates: Optional[Set[TermKey]] = None
+        for token in sorted(tokens, key=len, reverse=True):  # longest prefixes are the most selective
+            matched = self._matching(token)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return 0, []
+        terms = (self._terms[key] for key in candidates)
+        top = heapq.nlargest(
+            limit, terms, key=lambda term: (tokens <= term.tokens, term.last_session_date, len(term.sessions))
+        )
+        return len(candidates), [term.to_dict() for term in top]
+
+progress_search_index: ProgressViewStore[ProgressSearchView] = ProgressViewStore(
+    "progress_search",
+    ProgressSearchView,
+    maxsize=settings.PROGRESS_VIEW_CACHE_SIZE,
+    ttl=settings.PROGRESS_VIEW_CACHE_TTL,
+    sync_interval=settings.PROGRESS_VIEW_SYNC_INTERVAL,
+    sync_overlap=settings.PROGRESS_VIEW_SYNC_OVERLAP,
+)
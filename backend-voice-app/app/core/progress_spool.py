@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Iterable, List, Optional, Tuple
+
+from postgrest import APIError
+
+from app.core.config import settings
+from app.core.metrics import MetricFamily, registry
+from app.core.progress_views import record_progress
+from app.core.supabase import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    failed_at REAL NOT NULL,
+    error TEXT
+);
+"""
+
+SpoolEntry = Tuple[int, str, dict, float, int]
+
+def _is_rejection(error: APIError) -> bool:
+    """
+    True when Postgres refused the data itself (SQLSTATE classes 22 data
+    exception, 23 integrity violation, 42 syntax/undefined object).
+    Anything else is treated as transient and retried as a whole.
+    """
+    return str(error.code or "")[:2] in ("22", "23", "42")
+
+class ProgressSpool:
+    """
+    Durable write-behind queue for progress_logs inserts.
+
+    `append()` commits the row to a local SQLite database in WAL mode and
+    returns. A background task sends the oldest rows upstream in batches.
+    Every row carries an idempotency_key, so a batch that reached Supabase
+    but was not acknowledged can be re-sent without duplicates. Network
+    failures back off exponentially with jitter. If PostgREST rejects a
+    batch, its rows are retried one by one. A row still rejected after
+    `max_attempts` moves to the `dead_letter` table.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int,
+        flush_interval: float,
+        max_backoff: float,
+        max_attempts: int,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.depth = 0
+        self.oldest_enqueued_at: Optional[float] = None
+        self.flushed = 0
+        self.flush_failures = 0
+        self.dead_lettered = 0
+        self.drain_rate = 0.0  # EWMA rows/second
+        self.last_flush_at: Optional[float] = None
+        registry.register(self.collect)
+
+    # -- SQLite (always called from a worker thread) --------------------------------
+
+    def _open(self) -> None:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=FULL")
+        db.executescript(_SCHEMA)
+        self._db = db
+        self._refresh_stats()
+
+    def _refresh_stats(self) -> None:
+        depth, oldest = self._db.execute("SELECT COUNT(*), MIN(enqueued_at) FROM spool").fetchone()
+        self.depth = depth
+        self.oldest_enqueued_at = oldest
+
+    def _insert(self, user_id: str, payload: dict) -> None:
+        with self._db_lock:
+            now = time.time()
+            self._db.execute(
+                "INSERT INTO spool (user_id, payload, enqueued_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(payload), now),
+            )
+            self.depth += 1
+            if self.oldest_enqueued_at is None:
+                self.oldest_enqueued_at = now
+
+    def _peek(self) -> List[SpoolEntry]:
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT id, user_id, payload, enqueued_at, attempts FROM spool ORDER BY id LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+        return [(row_id, user_id, json.loads(payload), enqueued_at, attempts)
+                for row_id, user_id, payload, enqueued_at, attempts in rows]
+
+    def _delete(self, ids: Iterable[int]) -> None:
+        with self._db_lock:
+            self._db.executemany("DELETE FROM spool WHERE id = ?", [(row_id,) for row_id in ids])
+            self._refresh_stats()
+
+    def _mark_failed(self, entry: SpoolEntry, error: str) -> bool:
+        """Count a rejected attempt; returns True when the row was dead-lettered."""
+        row_id, user_id, payload, enqueued_at, attempts = entry
+        with self._db_lock:
+            if attempts + 1 < self.max_attempts:
+                self._db.execute("UPDATE spool SET attempts = attempts + 1 WHERE id = ?", (row_id,))
+                return False
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT OR REPLACE INTO dead_letter (id, user_id, payload, enqueued_at, failed_at, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (row_id, user_id, json.dumps(payload), enqueued_at, time.time(), error),
+            )
+            self._db.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+            self._db.execute("COMMIT")
+            self._refresh_stats()
+            return True
+
+    # -- public API ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        await asyncio.to_thread(self._open)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Best effort: whatever is left stays on disk for the next start.
+        try:
+            await asyncio.wait_for(self.flush_once(), timeout=drain_timeout)
+        except Exception:
+            pass
+        db, self._db = self._db, None
+        if db is not None:
+            await asyncio.to_thread(db.close)
+
+    async def append(self, user_id: str, row: dict) -> str:
+        """Durably queue a progress_logs row and return its idempotency key."""
+        row = dict(row)
+        row.setdefault("idempotency_key", None)
+        if row["idempotency_key"] is None:
+            row["idempotency_key"] = str(uuid.uuid4())
+        await asyncio.to_thread(self._insert, user_id, row)
+        self._wakeup.set()
+        return row["idempotency_key"]
+
+    async def flush_once(self) -> int:
+        """Send one batch upstream. Returns the number of rows removed from the spool."""
+        entries = await asyncio.to_thread(self._peek)
+        if not entries:
+            return 0
+        started = time.monotonic()
+        supabase = get_supabase_client()
+        try:
+            res = await supabase.table("progress_logs") \
+                .upsert([entry[2] for entry in entries], on_conflict="user_id,idempotency_key", ignore_duplicates=True) \
+                .execute()
+        except APIError as e:
+            if not _is_rejection(e):
+                raise
+            # Postgres rejected the batch: isolate the offending rows.
+            return await self._flush_individually(entries)
+        await asyncio.to_thread(self._delete, [entry[0] for entry in entries])
+        self._acknowledge(res.data or [], len(entries), started)
+        return len(entries)
+
+    async def _flush_individually(self, entries: List[SpoolEntry]) -> int:
+        supabase = get_supabase_client()
+        removed = 0
+        for entry in entries:
+            started = time.monotonic()
+            try:
+                res = await supabase.table("progress_logs") \
+                    .upsert(entry[2], on_conflict="user_id,idempotency_key", ignore_duplicates=True) \
+                    .execute()
+            except APIError as e:
+                if not _is_rejection(e):
+                    raise
+                if await asyncio.to_thread(self._mark_failed, entry, e.message or str(e)):
+                    self.dead_lettered += 1
+                    logger.error("progress log moved to dead_letter", extra={"spool_id": entry[0], "error": e.message})
+                    removed += 1
+                continue
+            await asyncio.to_thread(self._delete, [entry[0]])
+            self._acknowledge(res.data or [], 1, started)
+            removed += 1
+        return removed
+
+    def _acknowledge(self, inserted: List[dict], count: int, started: float) -> None:
+        self.flushed += count
+        now = time.monotonic()
+        rate = count / max(now - started, 1e-3)
+        self.drain_rate = rate if self.last_flush_at is None else 0.8 * self.drain_rate + 0.2 * rate
+        self.last_flush_at = now
+        by_user = {}
+        for row in inserted:
+            by_user.setdefault(row["user_id"], []).append(row)
+        for user_id, rows in by_user.items():
+            record_progress(user_id, rows)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                removed = await self.flush_once()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Upstream unreachable or timing out: back off with full jitter.
+                self.flush_failures += 1
+                failures += 1
+                delay = min(self.max_backoff, self.flush_interval * 2 ** failures)
+                logger.warning("progress spool flush failed (attempt %d, depth %d): %s", failures, self.depth, e)
+                await asyncio.sleep(random.uniform(self.flush_interval, delay))
+                continue
+            if removed and self.depth:
+                continue  # keep draining while there is a backlog
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def collect(self):
+        lag = time.time() - self.oldest_enqueued_at if self.oldest_enqueued_at else 0.0
+        yield MetricFamily("progress_spool_depth", "gauge", "Progress logs waiting in the local spool.").add(self.depth)
+        yield MetricFamily("progress_spool_flush_lag_seconds", "gauge", "Age of the oldest spooled progress log.").add(lag)
+        yield MetricFamily("progress_spool_drain_rate", "gauge", "Smoothed rows per second sent upstream.").add(self.drain_rate)
+        yield MetricFamily("progress_spool_flushed_total", "counter", "Progress logs sent upstream from the spool.").add(self.flushed)
+        yield MetricFamily("progress_spool_flush_failures_total", "counter", "Flush attempts that failed and backed off.").add(self.flush_failures)
+        yield MetricFamily("progress_spool_dead_letter_total", "counter", "Progress logs moved to dead_letter after repeated rejection.").add(self.dead_lettered)
+
+progress_spool = ProgressSpool(
+    path=settings.PROGRESS_SPOOL_PATH,
+    batch_size=settings.PROGRESS_SPOOL_BATCH_SIZE,
+    flush_interval=settings.PROGRESS_SPOOL_FLUSH_INTERVAL,
+    max_backoff=settings.PROGRESS_SPOOL_MAX_BACKOFF,
+    max_attempts=settings.PROGRESS_SPOOL_MAX_ATTEMPTS,
+)
@@ -0,0 +1,86 @@
+import bisect
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.progress_views import ProgressView, ProgressViewStore, parse_timestamp
+
+def normalize_term(value: str) -> str:
+    return " ".join(value.lower().split())
+
+class ProgressSummaryView(ProgressView):
+    """
+    Running totals over a user's progress logs. Each row updates them in
+    O(1), apart from the short rolling level history.
+    """
+
+    columns = "id,session_date,duration_minutes,new_vocabulary,grammar_points,suggested_level"
+
+    def __init__(self, level_history_size: int = settings.PROGRESS_LEVEL_HISTORY_SIZE):
+        super().__init__()
+        self.total_sessions = 0
+        self.total_minutes = 0
+        self.vocabulary: Set[str] = set()
+        # Latest (session_date, status) per grammar point, plus counts per status.
+        self.grammar_points: Dict[str, Tuple[datetime, str]] = {}
+        self.grammar_status_counts: Counter = Counter()
+        self.level_history: List[Tuple[datetime, str]] = []
+        self._level_history_size = level_history_size
+        self.last_session_date: Optional[datetime] = None
+
+    def apply(self, row: dict) -> None:
+        session_date = parse_timestamp(row["session_date"])
+        self.total_sessions += 1
+        self.total_minutes += row.get("duration_minutes") or 0
+        if self.last_session_date is None or session_date > self.last_session_date:
+            self.last_session_date = session_date
+
+        for word in row.get("new_vocabulary") or []:
+            term = normalize_term(word)
+            if term:
+                self.vocabulary.add(term)
+
+        for grammar_point in row.get("grammar_points") or []:
+            point = normalize_term(grammar_point.get("point") or "")
+            if not point:
+                continue
+            status = grammar_point.get("status") or "practiced"
+            previous = self.grammar_points.get(point)
+            if previous is not None and previous[0] > session_date:
+                continue  # an older session arriving late does not override
+            if previous is not None:
+                self.grammar_status_counts[previous[1]] -= 1
+                if not self.grammar_status_counts[previous[1]]:
+                    del self.grammar_status_counts[previous[1]]
+            self.grammar_points[point] = (session_date, status)
+            self.grammar_status_counts[status] += 1
+
+        level = row.get("suggested_level")
+        if level:
+            bisect.insort(self.level_history, (session_date, level))
+            if len(self.level_history) > self._level_history_size:
+                del self.level_history[0]
+
+    def to_dict(self) -> dict:
+        return {
+            "total_sessions": self.total_sessions,
+            "total_minutes": self.total_minutes,
+            "words_learned": len(self.vocabulary),
+            "grammar_points_by_status": dict(self.grammar_status_counts),
+            "current_level": self.level_history[-1][1] if self.level_history else None,
+            "level_history": [
+                {"session_date": session_date, "suggested_level": level}
+                for session_date, level in self.level_history
+            ],
+            "last_session_date": self.last_session_date,
+        }
+
+progress_summaries: ProgressViewStore[ProgressSummaryView] = ProgressViewStore(
+    "progress_summary",
+    ProgressSummaryView,
+    maxsize=settings.PROGRESS_VIEW_CACHE_SIZE,
+    ttl=settings.PROGRESS_VIEW_CACHE_TTL,
+    sync_interval=settings.PROGRESS_VIEW_SYNC_INTERVAL,
+    sync_overlap=settings.PROGRESS_VIEW_SYNC_OVERLAP,
+)
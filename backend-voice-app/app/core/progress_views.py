@@ -0,0 +1,136 @@
+import abc
+import asyncio
+import time
+import weakref
+from datetime import datetime
+from typing import Callable, ClassVar, Generic, Iterable, List, Set, TypeVar
+
+from app.core.cache import TTLCache
+from app.core.metrics import register_cache
+
+def parse_timestamp(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+class ProgressView(abc.ABC):
+    """
+    Per-user state folded incrementally from `progress_logs` rows.
+
+    Rows are applied at most once. `watermark` is the highest id pulled
+    from the database. Ids are handed out before commit, so a lower id can
+    become visible after a higher one: syncs re-read from `settled`, a
+    window below the watermark, and every id folded above `settled` is
+    remembered so neither those re-reads nor rows this worker inserted
+    itself are applied twice. Subclasses declare the `columns` they need
+    and implement `apply()`.
+    """
+
+    columns: ClassVar[str] = "*"
+
+    def __init__(self):
+        self.watermark = 0
+        self.settled = 0
+        self.synced_at = 0.0
+        self._folded: Set[int] = set()
+
+    @abc.abstractmethod
+    def apply(self, row: dict) -> None:
+        ...
+
+    def fold(self, row: dict) -> None:
+        row_id = row.get("id")
+        if isinstance(row_id, int):
+            if row_id <= self.settled or row_id in self._folded:
+                return
+            self._folded.add(row_id)
+        self.apply(row)
+
+    def advance(self, watermark: int, overlap: int = 0) -> None:
+        self.watermark = max(self.watermark, watermark)
+        self.settled = max(self.settled, self.watermark - overlap)
+        self._folded = {row_id for row_id in self._folded if row_id > self.settled}
+
+V = TypeVar("V", bound=ProgressView)
+
+_stores: List["ProgressViewStore"] = []
+
+class ProgressViewStore(Generic[V]):
+    """
+    Bounded set of per-user views. The first read builds a user's view from
+    their history. Later reads only pull rows above the watermark (less a
+    `sync_overlap` window of ids for late commits), and only when the view
+    is older than `sync_interval`. Inserts made by this
+    process reach the view immediately through `record_progress()`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], V],
+        maxsize: int,
+        ttl: float,
+        sync_interval: float,
+        sync_overlap: int = 0,
+        page_size: int = 1000,
+    ):
+        self.name = name
+        self._factory = factory
+        self._views: TTLCache[str, V] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._sync_interval = sync_interval
+        self._sync_overlap = sync_overlap
+        self._page_size = page_size
+        register_cache(name, self._views)
+        _stores.append(self)
+
+    def _lock(self, user_id: str) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+
+    async def get(self, supabase, user_id: str) -> V:
+        view = self._views.get(user_id)
+        if view is not None and time.monotonic() - view.synced_at < self._sync_interval:
+            return view
+        async with self._lock(user_id):
+            view = self._views.peek(user_id) or self._factory()
+            await self._sync(supabase, user_id, view)
+            self._views.set(user_id, view)
+            return view
+
+    async def _sync(self, supabase, user_id: str, view: V) -> None:
+        after = view.settled
+        while True:
+            res = await supabase.table("progress_logs") \
+                .select(view.columns) \
+                .eq("user_id", user_id) \
+                .gt("id", after) \
+                .order("id") \
+                .limit(self._page_size) \
+                .execute()
+            rows = res.data or []
+            for row in rows:
+                view.fold(row)
+            if rows:
+                after = rows[-1]["id"]
+                view.advance(after, self._sync_overlap)
+            if len(rows) < self._page_size:
+                break
+        view.synced_at = time.monotonic()
+
+    def record(self, user_id: str, rows: Iterable[dict]) -> None:
+        view = self._views.peek(user_id)
+        if view is None:
+            # Not cached here: the next read builds it from the database anyway.
+            return
+        for row in rows:
+            view.fold(row)
+
+def record_progress(user_id: str, rows: Iterable[dict]) -> None:
+    """Fold freshly inserted progress_logs rows into every cached view of this user."""
+    rows = list(rows)
+    for store in _stores:
+        store.record(user_id, rows)
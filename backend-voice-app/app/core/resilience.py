@@ -0,0 +1,281 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Iterable, Optional, Set
+
+import httpx
+
+from app.core.metrics import MetricFamily, registry
+
+upstream_attempts_total = registry.counter(
+    "upstream_attempts_total",
+    "Attempts made by resilient upstream calls, by kind (first, hedge, retry).",
+    ("call", "kind"),
+)
+upstream_hedge_wins_total = registry.counter(
+    "upstream_hedge_wins_total", "Calls answered by the hedged attempt rather than the one it raced.", ("call",)
+)
+circuit_breaker_rejections_total = registry.counter(
+    "circuit_breaker_rejections_total", "Calls failed fast because the circuit was open.", ("name",)
+)
+
+# Statuses that mean "try again" rather than "this request is wrong"
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+def is_retryable_response(response: httpx.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUSES
+
+def is_retryable_error(error: BaseException) -> bool:
+    # Connect failures, timeouts and dropped connections. Only used for calls
+    # where a duplicate is harmless (an extra Realtime session just expires).
+    return isinstance(error, httpx.TransportError)
+
+class CircuitOpen(Exception):
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"circuit {name} is open")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Opens when at least `failure_ratio` of the last `window` attempts (and no
+    fewer than `min_calls`) failed, then fails fast for `reset_timeout`
+    seconds. After that one probe is let through: success closes the
+    circuit, failure opens it again.
+
+    `allow()` hands out a ticket that the attempt passes back to `record()`
+    or `abandon()`. Outcomes of attempts allowed before the circuit last
+    opened or closed are dropped, so stragglers neither re-open an open
+    circuit nor decide the probe; only the probe's own ticket resolves
+    HALF_OPEN.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, *, window: int, min_calls: int, failure_ratio: float, reset_timeout: float):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._issued = 0
+        self._closed_since = 1  # first ticket issued in the current closed period
+        self._probe: Optional[int] = None
+
+    def retry_after(self) -> int:
+        remaining = self._opened_at + self.reset_timeout - time.monotonic()
+        return max(1, int(remaining + 0.999))
+
+    def allow(self) -> int:
+        """Return the ticket for an attempt, or raise CircuitOpen if none may be made now."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                circuit_breaker_rejections_total.inc(name=self.name)
+                raise CircuitOpen(self.name, self.retry_after())
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and self._probe is not None:
+            circuit_breaker_rejections_total.inc(name=self.name)
+            raise CircuitOpen(self.name, 1)
+        self._issued += 1
+        if self.state == self.HALF_OPEN:
+            self._probe = self._issued
+        return self._issued
+
+    def record(self, ticket: int, success: bool) -> None:
+        if self.state == self.HALF_OPEN:
+            if ticket != self._probe:
+                return
+            self._probe = None
+            if success:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._closed_since = self._issued + 1
+            else:
+                self._open()
+            return
+        if self.state == self.OPEN or ticket < self._closed_since:
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures >= self.failure_ratio * len(self._outcomes):
+            self._open()
+
+    def abandon(self, ticket: int) -> None:
+        """An allowed attempt ended without an outcome (cancelled, shed locally)."""
+        if self.state == self.HALF_OPEN and ticket == self._probe:
+            self._probe = None
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def collect(self) -> Iterable[MetricFamily]:
+        states = MetricFamily("circuit_breaker_state", "gauge", "1 for the breaker's current state.")
+        for state in (self.CLOSED, self.OPEN, self.HALF_OPEN):
+            states.add(1.0 if self.state == state else 0.0, name=self.name, state=state)
+        yield states
+        yield MetricFamily("circuit_breaker_opened_total", "counter", "Times the circuit opened.").add(self.opened, name=self.name)
+
+class LatencyWindow:
+    """Recent successful latencies; `quantile()` drives the hedge delay."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+Send = Callable[[], Awaitable[httpx.Response]]
+
+class ResilientCaller:
+    """
+    Runs an idempotent-enough upstream call with a circuit breaker, hedging
+    and retries:
+
+    - if the first attempt has not answered after the observed
+      `hedge_quantile` latency (clamped to [hedge_min_delay, hedge_max_delay];
+      `hedge_max_delay` until `min_samples` are seen), a second attempt races
+      it and whichever succeeds first wins;
+    - retryable failures (transport errors, 408/429/5xx) are retried after
+      full-jitter exponential backoff, up to `max_attempts` attempts in total;
+    - every attempt asks the breaker first, so an open circuit fails fast
+      with CircuitOpen.
+
+    Non-retryable responses are returned as they are for the caller to map.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        breaker: CircuitBreaker,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        hedge: bool,
+        hedge_quantile: float,
+        hedge_min_delay: float,
+        hedge_max_delay: float,
+        min_samples: int = 20,
+    ):
+        self.name = name
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyWindow()
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < self.min_samples:
+            return self.hedge_max_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, self.latencies.quantile(self.hedge_quantile)))
+
+    def _backoff(self, retry: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retry))
+
+    def _start(self, send: Send, kind: str) -> asyncio.Task:
+        ticket = self.breaker.allow()
+        upstream_attempts_total.inc(call=self.name, kind=kind)
+        return asyncio.create_task(self._attempt(send, ticket))
+
+    async def _attempt(self, send: Send, ticket: int) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await send()
+        except BaseException as e:
+            if is_retryable_error(e):
+                self.breaker.record(ticket, False)
+            else:
+                self.breaker.abandon(ticket)
+            raise
+        healthy = not is_retryable_response(response)
+        self.breaker.record(ticket, healthy)
+        if healthy:
+            self.latencies.observe(time.monotonic() - started)
+        return response
+
+    async def call(self, send: Send, *, hedge: Optional[bool] = None) -> httpx.Response:
+        hedge = self.hedge if hedge is None else hedge
+        pending: Set[asyncio.Task] = set()
+        hedge_task: Optional[asyncio.Task] = None
+        last: Optional[asyncio.Task] = None
+        attempts = retries = 0
+        try:
+            while True:
+                if not pending:
+                    if attempts >= self.max_attempts:
+                        return last.result()  # returns the last retryable response or raises its error
+                    if attempts:
+                        retries += 1
+                        await asyncio.sleep(self._backoff(retries))
+                    pending.add(self._start(send, "retry" if attempts else "first"))
+                    attempts += 1
+                    hedge_task = None
+                can_hedge = hedge and hedge_task is None and len(pending) == 1 and attempts < self.max_attempts
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.hedge_delay() if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    try:
+                        hedge_task = self._start(send, "hedge")
+                    except CircuitOpen:
+                        hedge = False
+                        continue
+                    pending.add(hedge_task)
+                    attempts += 1
+                    continue
+                for task in done:
+                    error = task.exception()
+                    if error is None and not is_retryable_response(task.result()):
+                        if task is hedge_task:
+                            upstream_hedge_wins_total.inc(call=self.name)
+                        return task.result()
+                    if error is not None and not is_retryable_error(error):
+                        if pending:
+                            # e.g. the hedge was shed locally: let the other attempt finish
+                            hedge = False
+                            continue
+                        raise error
+                    last = task
+        finally:
+            for task in pending:
+                task.cancel()
+
+def create_openai_sessions_caller(settings) -> ResilientCaller:
+    breaker = CircuitBreaker(
+        "openai_sessions",
+        window=settings.OPENAI_BREAKER_WINDOW,
+        min_calls=settings.OPENAI_BREAKER_MIN_CALLS,
+        failure_ratio=settings.OPENAI_BREAKER_FAILURE_RATIO,
+        reset_timeout=settings.OPENAI_BREAKER_RESET_TIMEOUT,
+    )
+    registry.register(breaker.collect)
+    return ResilientCaller(
+        "openai_sessions",
+        breaker=breaker,
+        max_attempts=settings.OPENAI_MAX_ATTEMPTS,
+        backoff_base=settings.OPENAI_RETRY_BACKOFF_BASE,
+        backoff_max=settings.OPENAI_RETRY_BACKOFF_MAX,
+        hedge=settings.OPENAI_HEDGE_ENABLED,
+        hedge_quantile=settings.OPENAI_HEDGE_QUANTILE,
+        hedge_min_delay=settings.OPENAI_HEDGE_MIN_DELAY,
+        hedge_max_delay=settings.OPENAI_HEDGE_MAX_DELAY,
+    )
@@ -0,0 +1,45 @@
+import json
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+try:  # optional: pip install orjson
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-native data (plus datetime/UUID) straight to bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def trusted_response(content: Any, status_code: int = 200) -> Any:
+    """
+    Return database-sourced content without a second pass through the route's
+    response_model when FAST_JSON_RESPONSES is on. With it off the content is
+    returned untouched and FastAPI validates it as usual.
+
+    An explicit response replaces the route decorator's status, so routes
+    declared with another status_code must pass it here too.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(content, status_code=status_code)
+    return content
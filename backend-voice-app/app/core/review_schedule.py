@@ -0,0 +1,161 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.progress_summary import normalize_term
+from app.core.progress_views import ProgressView, ProgressViewStore, parse_timestamp
+
+VOCABULARY, GRAMMAR_POINT = "vocabulary", "grammar_point"
+NEEDS_REVIEW = "needs_review"
+
+ItemKey = Tuple[str, str]
+
+class ReviewItem:
+    """Spaced-repetition state of one grammar point or word."""
+
+    __slots__ = ("kind", "text", "status", "example", "last_seen", "streak", "times_seen", "due_at", "seq")
+
+    def __init__(self, kind: str, text: str):
+        self.kind = kind
+        self.text = text
+        self.status: Optional[str] = None
+        self.example: Optional[str] = None
+        self.last_seen: Optional[datetime] = None
+        self.streak = 0
+        self.times_seen = 0
+        self.due_at: Optional[datetime] = None
+        self.seq = -1  # sequence number of this item's live heap entry
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "text": self.text,
+            "status": self.status,
+            "example": self.example,
+            "last_seen": self.last_seen,
+            "due_at": self.due_at,
+            "times_seen": self.times_seen,
+            "streak": self.streak,
+        }
+
+class ReviewScheduleView(ProgressView):
+    """
+    Per-user review queue. Every grammar point and word a session touches
+    is rescheduled: `needs_review` brings it back after `base_interval`,
+    any other outcome in a later session doubles the interval (capped at
+    `max_interval`).
+
+    Items sit in a min-heap keyed on due time. Rescheduling pushes a new
+    entry and leaves the old one behind as stale (its `seq` no longer
+    matches the item), so each update is O(log n); stale entries are
+    skipped when popped and the heap is rebuilt once they outnumber the
+    live ones.
+    """
+
+    columns = "id,session_date,new_vocabulary,grammar_points"
+
+    def __init__(
+        self,
+        base_interval: timedelta = timedelta(days=settings.REVIEW_BASE_INTERVAL_DAYS),
+        max_interval: timedelta = timedelta(days=settings.REVIEW_MAX_INTERVAL_DAYS),
+    ):
+        super().__init__()
+        self._base_interval = base_interval
+        self._max_interval = max_interval
+        self._items: Dict[ItemKey, ReviewItem] = {}
+        self._heap: List[Tuple[float, int, ItemKey]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _interval(self, streak: int) -> timedelta:
+        return min(self._max_interval, self._base_interval * 2 ** min(streak, 32))
+
+    def _seen(self, kind: str, text: str, session_date: datetime, status: Optional[str], example: Optional[str]) -> None:
+        key = (kind, normalize_term(text))
+        if not key[1]:
+            return
+        item = self._items.get(key)
+        if item is None:
+            item = self._items[key] = ReviewItem(kind, text.strip())
+        item.times_seen += 1
+        if item.last_seen is not None and session_date < item.last_seen:
+            return  # an older session arriving late does not reschedule
+        if status == NEEDS_REVIEW:
+            item.streak = 0
+        elif item.last_seen is not None and session_date > item.last_seen:
+            # Once per session: a term repeated within the same session is one sighting
+            item.streak += 1
+        item.text = text.strip()
+        item.status = status
+        item.example = example or item.example
+        item.last_seen = session_date
+        item.due_at = session_date + self._interval(item.streak)
+        item.seq = next(self._seq)
+        heapq.heappush(self._heap, (item.due_at.timestamp(), item.seq, key))
+        if len(self._heap) > 2 * len(self._items) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [(item.due_at.timestamp(), item.seq, key) for key, item in self._items.items()]
+        heapq.heapify(self._heap)
+
+    def apply(self, row: dict) -> None:
+        session_date = parse_timestamp(row["session_date"])
+        for grammar_point in row.get("grammar_points") or []:
+            examples = grammar_point.get("examples") or []
+            self._seen(
+                GRAMMAR_POINT,
+                grammar_point.get("point") or "",
+                session_date,
+                grammar_point.get("status") or "practiced",
+                examples[0] if examples else None,
+            )
+        for word in row.get("new_vocabulary") or []:
+            self._seen(VOCABULARY, word, session_date, None, None)
+
+    def due(self, now: datetime, limit: int) -> List[ReviewItem]:
+        """
+        The `limit` most overdue items (due at or before `now`), most overdue
+        first: O(limit * log n) pops, pushed back afterwards.
+        """
+        cutoff = now.timestamp()
+        taken: List[Tuple[float, int, ItemKey]] = []
+        while self._heap and len(taken) < limit:
+            due_ts, seq, key = self._heap[0]
+            if self._items[key].seq != seq:
+                heapq.heappop(self._heap)  # stale: superseded by a later reschedule
+                continue
+            if due_ts > cutoff:
+                break
+            taken.append(heapq.heappop(self._heap))
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [self._items[key] for _, _, key in taken]
+
+def review_instructions(items: List[ReviewItem]) -> Optional[str]:
+    """Block to append to the voice session `instructions` so the tutor works the due items in."""
+    if not items:
+        return None
+    lines = ["**Repaso pendiente:** incorpora estos puntos de forma natural en la conversación."]
+    for item in items:
+        if item.kind == GRAMMAR_POINT:
+            line = f"- Gramática: {item.text}"
+            if item.example:
+                line += f' (ejemplo del alumno: "{item.example}")'
+        else:
+            line = f"- Vocabulario: {item.text}"
+        lines.append(line)
+    return "\n".join(lines)
+
+review_schedules: ProgressViewStore[ReviewScheduleView] = ProgressViewStore(
+    "review_schedule",
+    ReviewScheduleView,
+    maxsize=settings.PROGRESS_VIEW_CACHE_SIZE,
+    ttl=settings.PROGRESS_VIEW_CACHE_TTL,
+    sync_interval=settings.PROGRESS_VIEW_SYNC_INTERVAL,
+    sync_overlap=settings.PROGRESS_VIEW_SYNC_OVERLAP,
+)
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.core.metrics import MetricFamily, registry
+
+# OpenAI ephemeral keys live for one minute; used when a response has no expires_at.
+DEFAULT_SESSION_LIFETIME = 60.0
+
+logger = logging.getLogger(__name__)
+
+Mint = Callable[[str], Awaitable[Dict[str, Any]]]
+
+@dataclass
+class _TopicSlot:
+    instructions: str
+    sessions: Deque[Tuple[float, Dict[str, Any]]] = field(default_factory=deque)
+    rate: float = 0.0          # EWMA of requests per second
+    pending_requests: int = 0  # requests since the last rate update
+    minting: int = 0
+    last_request: float = field(default_factory=time.monotonic)
+
+class EphemeralSessionPool:
+    """
+    Warm pool of pre-created OpenAI Realtime sessions for the hottest topics.
+
+    Every `acquire()` records demand for its topic. A background task keeps
+    an EWMA of each topic's request rate, pre-mints sessions for the
+    `max_topics` busiest ones and sizes each queue to cover the requests
+    expected while a replacement is minted. Sessions are dropped
+    `expiry_margin` seconds before their `client_secret` expires so a client
+    never receives a key it cannot use.
+    """
+
+    def __init__(
+        self,
+        mint: Mint,
+        *,
+        max_topics: int,
+        max_per_topic: int,
+        min_rate: float,
+        expiry_margin: float,
+        refill_interval: float,
+        rate_half_life: float = 60.0,
+    ):
+        self._mint = mint
+        self.max_topics = max_topics
+        self.max_per_topic = max_per_topic
+        self.min_rate = min_rate
+        self.expiry_margin = expiry_margin
+        self.refill_interval = refill_interval
+        self.rate_half_life = rate_half_life
+        self._slots: Dict[str, _TopicSlot] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._last_tick = time.monotonic()
+        self._mint_latency = 1.0   # EWMA seconds, seeded pessimistically
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.minted = 0
+        self.mint_failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._slots.clear()
+
+    def acquire(self, instructions: str) -> Optional[Dict[str, Any]]:
+        """Take a ready session for these instructions, or None on a miss."""
+        if not self.running:
+            return None
+        slot = self._slots.get(instructions)
+        if slot is None:
+            slot = self._slots[instructions] = _TopicSlot(instructions)
+        slot.pending_requests += 1
+        slot.last_request = time.monotonic()
+        self._evict_expired(slot)
+        if slot.sessions:
+            _, session = slot.sessions.popleft()
+            self.hits += 1
+            self._wakeup.set()
+            return session
+        self.misses += 1
+        return None
+
+    def _usable_until(self, session: Dict[str, Any]) -> float:
+        secret = session.get("client_secret") or {}
+        expires_at = secret.get("expires_at")
+        if not isinstance(expires_at, (int, float)):
+            expires_at = time.time() + DEFAULT_SESSION_LIFETIME
+        return expires_at - self.expiry_margin
+
+    def _evict_expired(self, slot: _TopicSlot) -> None:
+        now = time.time()
+        while slot.sessions and slot.sessions[0][0] <= now:
+            slot.sessions.popleft()
+            self.expired += 1
+
+    def _update_rates(self) -> None:
+        now = time.monotonic()
+        elapsed = max(now - self._last_tick, 1e-3)
+        self._last_tick = now
+        decay = 0.5 ** (elapsed / self.rate_half_life)
+        for instructions, slot in list(self._slots.items()):
+            observed = slot.pending_requests / elapsed
+            slot.rate = decay * slot.rate + (1 - decay) * observed
+            slot.pending_requests = 0
+            idle = now - slot.last_request
+            if not slot.sessions and not slot.minting and idle > self.rate_half_life * 4:
+                del self._slots[instructions]
+
+    def _target(self, slot: _TopicSlot) -> int:
+        # Cover the requests expected while a replacement is being minted.
+        lead_time = self._mint_latency + self.refill_interval
+        return min(self.max_per_topic, max(1, math.ceil(slot.rate * lead_time)))
+
+    def _hot_slots(self) -> List[_TopicSlot]:
+        candidates = [slot for slot in self._slots.values() if slot.rate >= self.min_rate]
+        candidates.sort(key=lambda slot: slot.rate, reverse=True)
+        return candidates[: self.max_topics]
+
+    async def _mint_into(self, slot: _TopicSlot) -> None:
+        slot.minting += 1
+        start = time.monotonic()
+        try:
+            session = await self._mint(slot.instructions)
+        except Exception as e:
+            self.mint_failures += 1
+            logger.warning("session pool mint failed: %s", e)
+            return
+        finally:
+            slot.minting -= 1
+        self._mint_latency = 0.8 * self._mint_latency + 0.2 * (time.monotonic() - start)
+        self.minted += 1
+        slot.sessions.append((self._usable_until(session), session))
+
+    async def _refill(self) -> None:
+        hot = self._hot_slots()
+        hot_ids = {id(slot) for slot in hot}
+        jobs = []
+        for slot in self._slots.values():
+            self._evict_expired(slot)
+            if id(slot) not in hot_ids:
+                # Cooled-down topics keep what they hold until it expires.
+                continue
+            deficit = self._target(slot) - len(slot.sessions) - slot.minting
+            jobs.extend(self._mint_into(slot) for _ in range(max(0, deficit)))
+        if jobs:
+            await asyncio.gather(*jobs)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._update_rates()
+            await self._refill()
+
+    def collect(self) -> Iterable[MetricFamily]:
+        yield MetricFamily("openai_session_pool_hits_total", "counter", "Ephemeral keys served from the warm pool.").add(self.hits)
+        yield MetricFamily("openai_session_pool_misses_total", "counter", "Ephemeral key requests the pool could not serve.").add(self.misses)
+        yield MetricFamily("openai_session_pool_expired_total", "counter", "Pooled sessions dropped before use because they were about to expire.").add(self.expired)
+        yield MetricFamily("openai_session_pool_minted_total", "counter", "Sessions pre-minted by the pool.").add(self.minted)
+        yield MetricFamily("openai_session_pool_mint_failures_total", "counter", "Failed background mint attempts.").add(self.mint_failures)
+        ready = MetricFamily("openai_session_pool_ready", "gauge", "Sessions ready to hand out, by topic rank.")
+        rate = MetricFamily("openai_session_pool_request_rate", "gauge", "Smoothed requests per second, by topic rank.")
+        for rank, slot in enumerate(sorted(self._slots.values(), key=lambda s: s.rate, reverse=True)[: self.max_topics]):
+            ready.add(len(slot.sessions), rank=str(rank))
+            rate.add(slot.rate, rank=str(rank))
+        yield ready
+        yield rate
+
+def create_session_pool(mint: Mint, settings) -> EphemeralSessionPool:
+    pool = EphemeralSessionPool(
+        mint,
+        max_topics=settings.OPENAI_SESSION_POOL_MAX_TOPICS,
+        max_per_topic=settings.OPENAI_SESSION_POOL_MAX_PER_TOPIC,
+        min_rate=settings.OPENAI_SESSION_POOL_MIN_RATE,
+        expiry_margin=settings.OPENAI_SESSION_POOL_EXPIRY_MARGIN,
+        refill_interval=settings.OPENAI_SESSION_POOL_REFILL_INTERVAL,
+    )
+    registry.register(pool.collect)
+    return pool
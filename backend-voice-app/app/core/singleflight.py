@@ -0,0 +1,67 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional
+
+from app.core.cache import TTLCache
+from app.core.metrics import MetricFamily, registry
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller starts the work as a task and every concurrent caller
+    with the same key awaits that task. The work keeps running if the
+    caller that started it goes away. A successful result is also kept for
+    `grace` seconds so a quick retry or double tap reuses it. `cache_if`
+    decides which results count as successful.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        grace: float,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        max_recent: int = 10000,
+    ):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._recent: TTLCache[Hashable, Any] = TTLCache(maxsize=max_recent, ttl=grace)
+        self._grace = grace
+        self._cache_if = cache_if or (lambda result: True)
+        self.calls = 0
+        self.coalesced = 0
+        self.reused = 0
+        registry.register(self.collect)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        if self._grace > 0:
+            recent = self._recent.get(key)
+            if recent is not None:
+                self.reused += 1
+                return recent
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if self._grace > 0 and self._cache_if(result):
+            self._recent.set(key, result)
+
+    def collect(self) -> Iterable[MetricFamily]:
+        saved = MetricFamily("singleflight_saved_total", "counter", "Upstream calls avoided by coalescing, by reason.")
+        saved.add(self.coalesced, name=self.name, reason="inflight")
+        saved.add(self.reused, name=self.name, reason="grace")
+        yield MetricFamily("singleflight_calls_total", "counter", "Calls made through a single-flight group.").add(self.calls, name=self.name)
+        yield saved
+        yield MetricFamily("singleflight_inflight", "gauge", "Distinct keys currently in flight.").add(len(self._inflight), name=self.name)
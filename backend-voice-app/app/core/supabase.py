@@ -1,7 +1,68 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
+
+import httpx
 from app.core.config import settings
+from app.core.instrumentation import InstrumentedTransport, supabase_operation
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+supabase_client: Optional["AsyncClient"] = None
+# Sign-up/sign-in go through a second client on the same connection pool: supabase-py
+# switches a client's Authorization header to the user's token after every sign-in,
+# which must never happen to the client shared by all data queries.
+supabase_auth_client: Optional["AsyncClient"] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+async def init_supabase_client() -> "AsyncClient":
+    """
+    Create the shared async Supabase client on top of a pooled httpx client.
+    Called once from the application lifespan.
+    """
+    global supabase_client, supabase_auth_client, _http_client
+    if supabase_client is not None:
+        return supabase_client
+    # Imported here, not at module level: the supabase package (realtime, storage,
+    # functions, ...) is a large share of `import app.main` and only the lifespan needs it.
+    from supabase import AsyncClientOptions, acreate_client
+
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+    )
+    _http_client = httpx.AsyncClient(
+        transport=InstrumentedTransport(transport, "supabase", supabase_operation),
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT),
+        follow_redirects=True,
+    )
+    options = dict(httpx_client=_http_client, auto_refresh_token=False, persist_session=False)
+    supabase_client = await acreate_client(
+        settings.SUPABASE_URL, settings.SUPABASE_KEY, options=AsyncClientOptions(**options)
+    )
+    supabase_auth_client = await acreate_client(
+        settings.SUPABASE_URL, settings.SUPABASE_KEY, options=AsyncClientOptions(**options)
+    )
+    return supabase_client
+
+async def close_supabase_client() -> None:
+    """Release the pooled connections. Called on application shutdown."""
+    global supabase_client, supabase_auth_client, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    supabase_client = None
+    supabase_auth_client = None
+    _http_client = None
 
-supabase_client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+def get_supabase_client() -> "AsyncClient":
+    if supabase_client is None:
+        raise RuntimeError("Supabase client is not initialised; is the app lifespan running?")
+    return supabase_client
 
-def get_supabase_client():
-    return supabase_client
\ No newline at end of file
+def get_supabase_auth_client() -> "AsyncClient":
+    """Client for GoTrue calls (sign up / sign in) only; see `supabase_auth_client`."""
+    if supabase_auth_client is None:
+        raise RuntimeError("Supabase client is not initialised; is the app lifespan running?")
+    return supabase_auth_client
@@ -1,30 +1,131 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.routers import profile, topics, auth, openai, progress
-
-app = FastAPI(
-    title="Backend Voice App",
-    description="API for the voice-based learning mobile application.",
-    version="1.0.0"
-)
-
-# CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], # You should restrict this to your app's domain in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(profile.router, prefix="/profile", tags=["Profile"])
-app.include_router(topics.router, tags=["Topics"])
-app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-app.include_router(openai.router, tags=["OpenAI"])
-app.include_router(progress.router, tags=["Progress"])
-
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to the Voice App API"}
+from app.core.catalog import topic_catalog
+from app.core.supabase import init_supabase_client, close_supabase_client, get_supabase_client
+from app.core.instrumentation import MetricsMiddleware
+from app.core.openai_client import init_openai_client, close_openai_client, get_openai_client
+from app.core.progress_spool import progress_spool
+from app.core.profiles import profile_provisioner
+from app.core.loop_watchdog import loop_watchdog
+from app.core.log import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.routers import profile, topics, auth, openai, progress, review, metrics, debug, health
+
+logger = logging.getLogger(__name__)
+
+async def prewarm() -> None:
+    """
+    Open the upstream connections and fill the caches the first requests
+    would otherwise pay for. Best effort: failures are logged, not raised.
+    """
+    async def supabase():
+        snapshot = await topic_catalog.get(get_supabase_client())
+        for topic_id in snapshot.by_id:
+            openai.topic_prompts.get(snapshot, topic_id)
+
+    async def openai_connection():
+        # Any authenticated GET does: what matters is the pooled TLS (and HTTP/2) connection
+        await get_openai_client().get("/models")
+
+    results = await asyncio.gather(supabase(), openai_connection(), return_exceptions=True)
+    for upstream, result in zip(("supabase", "openai"), results):
+        if isinstance(result, Exception):
+            logger.warning("prewarm of %s failed: %s", upstream, result)
+
+async def _become_ready(app: FastAPI, started: float) -> None:
+    if settings.PREWARM_ENABLED:
+        try:
+            await asyncio.wait_for(prewarm(), settings.PREWARM_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("prewarm did not finish within %.1fs", settings.PREWARM_TIMEOUT)
+    app.state.readiness = "ready"
+    logger.info("ready to serve", extra={"startup_ms": round((time.perf_counter() - started) * 1000, 1)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    setup_logging(
+        level=settings.LOG_LEVEL,
+        fmt=settings.LOG_FORMAT,
+        debug_sample_rate=settings.LOG_DEBUG_SAMPLE_RATE,
+        queue_size=settings.LOG_QUEUE_SIZE,
+    )
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+    # Shared, pooled clients live for the whole process instead of per request.
+    # Building them opens no connections; prewarm (if enabled) does that.
+    await init_supabase_client()
+    await init_openai_client()
+    if settings.OPENAI_SESSION_POOL_ENABLED:
+        openai.session_pool.start()
+    if settings.PROGRESS_WRITE_BEHIND:
+        await progress_spool.start()
+    # Serve liveness right away; readiness flips once prewarming is done
+    becoming_ready = asyncio.create_task(_become_ready(app, started))
+    try:
+        yield
+    finally:
+        app.state.readiness = "stopping"
+        becoming_ready.cancel()
+        await asyncio.gather(becoming_ready, return_exceptions=True)
+        await progress_spool.stop()
+        await profile_provisioner.stop()
+        await openai.session_pool.stop()
+        await close_openai_client()
+        await close_supabase_client()
+        await loop_watchdog.stop()
+        shutdown_logging()
+
+def create_app() -> FastAPI:
+    """
+    Build the ASGI application. Nothing here touches the network: clients,
+    background workers and prewarming all start in the lifespan. The
+    upstream clients and workers are process-wide, so run one app's
+    lifespan at a time per process.
+    """
+    app = FastAPI(
+        title="Backend Voice App",
+        description="API for the voice-based learning mobile application.",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    app.state.readiness = "starting"
+
+    # CORS Middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"], # You should restrict this to your app's domain in production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Per-route latency/status/in-flight metrics, exposed on /metrics
+    app.add_middleware(MetricsMiddleware)
+
+    # Outermost: correlation id (X-Request-ID) for every log record of the request
+    app.add_middleware(RequestIdMiddleware)
+
+    # Include routers
+    app.include_router(profile.router, prefix="/profile", tags=["Profile"])
+    app.include_router(topics.router, tags=["Topics"])
+    app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
+    app.include_router(openai.router, tags=["OpenAI"])
+    app.include_router(progress.router, tags=["Progress"])
+    app.include_router(review.router, tags=["Review"])
+    app.include_router(metrics.router, tags=["Metrics"])
+    app.include_router(debug.router, tags=["Debug"])
+    app.include_router(health.router, tags=["Health"])
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Welcome to the Voice App API"}
+
+    return app
+
+# `uvicorn app.main:app`; `uvicorn --factory app.main:create_app` builds a fresh one
+app = create_app()
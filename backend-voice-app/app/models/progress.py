@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
+from app.core.config import settings
 
 class GrammarPoint(BaseModel):
     """Representa un punto gramatical específico practicado en la sesión."""
@@ -25,11 +26,84 @@ class ProgressLog(BaseModel):
         orm_mode = True
 
 
+class ProgressLogPartial(BaseModel):
+    """Proyección parcial de ProgressLog, usada cuando el cliente pide solo algunos campos (`fields=`)."""
+    id: Optional[int] = None
+    user_id: Optional[UUID] = None
+    session_date: Optional[datetime] = None
+    duration_minutes: Optional[int] = None
+    topics_discussed: Optional[List[str]] = None
+    new_vocabulary: Optional[List[str]] = None
+    grammar_points: Optional[List[GrammarPoint]] = None
+    ai_summary: Optional[str] = None
+    suggested_level: Optional[str] = None
+
+
 class ProgressLogCreate(BaseModel):
     session_date: datetime
-    duration_minutes: int
+    duration_minutes: int = Field(..., gt=0)
     topics_discussed: List[str]
     new_vocabulary: List[str]
     grammar_points: List[GrammarPoint]
     ai_summary: str
-    suggested_level: str
\ No newline at end of file
+    suggested_level: str
+
+
+class ProgressLogBatchItem(ProgressLogCreate):
+    """Un registro dentro de una carga por lotes (clientes que practicaron sin conexión)."""
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=128, description="Clave generada por el cliente; reintentos con la misma clave no duplican el registro.")
+
+
+class ProgressLogBatch(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.PROGRESS_BATCH_MAX_ITEMS, description="Registros a guardar; cada uno se valida por separado como ProgressLogBatchItem.")
+
+
+class ProgressLogBatchItemResult(BaseModel):
+    index: int = Field(..., description="Posición del registro en la lista enviada.")
+    status: Literal["created", "duplicate", "invalid"]
+    id: Optional[int] = Field(None, description="ID del registro creado.")
+    idempotency_key: Optional[str] = None
+    errors: Optional[List[Dict[str, Any]]] = Field(None, description="Errores de validación cuando status es 'invalid'.")
+
+
+class ProgressLogBatchResult(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    items: List[ProgressLogBatchItemResult]
+
+
+class LevelHistoryPoint(BaseModel):
+    session_date: datetime
+    suggested_level: str
+
+
+class ProgressSummaryRead(BaseModel):
+    """Totales acumulados del progreso del usuario."""
+    total_sessions: int = Field(..., description="Cantidad de sesiones registradas.")
+    total_minutes: int = Field(..., description="Minutos de práctica acumulados.")
+    words_learned: int = Field(..., description="Vocabulario distinto (sin distinguir mayúsculas).")
+    grammar_points_by_status: Dict[str, int] = Field(default_factory=dict, description="Puntos gramaticales distintos por su estado más reciente.")
+    current_level: Optional[str] = Field(None, description="Nivel sugerido en la sesión más reciente.")
+    level_history: List[LevelHistoryPoint] = Field(default_factory=list, description="Últimos niveles sugeridos, del más antiguo al más reciente.")
+    last_session_date: Optional[datetime] = None
+
+
+class ProgressSearchSession(BaseModel):
+    id: int
+    session_date: datetime
+
+
+class ProgressSearchHit(BaseModel):
+    """Una palabra, punto gramatical o ejemplo distinto y las sesiones en que apareció."""
+    kind: Literal["vocabulary", "grammar_point", "example"]
+    text: str = Field(..., description="Texto tal como apareció en la sesión más reciente.")
+    grammar_point: Optional[str] = Field(None, description="Punto gramatical al que pertenece el ejemplo (solo kind='example').")
+    last_session_date: datetime
+    sessions: List[ProgressSearchSession] = Field(..., description="Sesiones donde apareció, de la más reciente a la más antigua.")
+
+
+class ProgressSearchResult(BaseModel):
+    query: str
+    total: int = Field(..., description="Coincidencias encontradas; `hits` trae como máximo `limit`.")
+    hits: List[ProgressSearchHit]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Literal, Optional
+
+class ReviewItemRead(BaseModel):
+    """Un punto gramatical o palabra pendiente de repaso."""
+    kind: Literal["grammar_point", "vocabulary"]
+    text: str
+    status: Optional[str] = Field(None, description="Último estado registrado del punto gramatical (p. ej. 'needs_review').")
+    example: Optional[str] = Field(None, description="Un ejemplo de la conversación en que se practicó.")
+    last_seen: datetime = Field(..., description="Sesión más reciente en que apareció.")
+    due_at: datetime = Field(..., description="Momento en que tocaba repasarlo.")
+    times_seen: int
+    streak: int = Field(..., description="Sesiones seguidas sin marcarse 'needs_review'; alarga el intervalo.")
+
+class ReviewNextRead(BaseModel):
+    items: List[ReviewItemRead] = Field(..., description="Elementos vencidos, del más atrasado al menos atrasado.")
+    instructions: Optional[str] = Field(None, description="Bloque listo para añadir a `instructions` de /openai/ephemeral-key; null si no hay nada pendiente.")
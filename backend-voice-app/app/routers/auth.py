@@ -1,58 +1,61 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from app.models.user import UserCreate, UserLoginResponse, UserResponse, Token
-from app.core.supabase import supabase_client
+from app.core.admission import Overloaded, supabase_auth_limiter
+from app.core.profiles import profile_provisioner
+from app.core.supabase import get_supabase_auth_client
 from gotrue.errors import AuthApiError
 from app.core.deps import get_current_user
 import httpx
 from fastapi import Body
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.post("/signup", response_model=UserLoginResponse, status_code=status.HTTP_201_CREATED)
-def sign_up(user_create: UserCreate):
+async def sign_up(user_create: UserCreate, supabase = Depends(get_supabase_auth_client)):
     """
     Create a new user account without email verification.
     """
     try:
-        # Step 1: Create the user in Supabase
-        sign_up_res = supabase_client.auth.sign_up({
-            "email": user_create.email,
-            "password": user_create.password,
-            "options": {
-                'email_confirm': False
-            }
-        })
-
-        # After a successful sign-up, sign in to get a session
-        if sign_up_res.user:
-            login_res = supabase_client.auth.sign_in_with_password({
+        # One GoTrue round trip: with email confirmation disabled sign-up already returns a session
+        async with supabase_auth_limiter.slot():
+            sign_up_res = await supabase.auth.sign_up({
                 "email": user_create.email,
                 "password": user_create.password,
+                "options": {
+                    'email_confirm': False
+                }
             })
 
-            if login_res.user is None or login_res.session is None:
+        user, session = sign_up_res.user, sign_up_res.session
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se pudo crear el usuario en este momento."
+            )
+
+        if session is None:
+            # Projects that still require confirmation return no session: fall back to signing in
+            async with supabase_auth_limiter.slot():
+                login_res = await supabase.auth.sign_in_with_password({
+                    "email": user_create.email,
+                    "password": user_create.password,
+                })
+            user, session = login_res.user, login_res.session
+            if user is None or session is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="No se pudo iniciar sesión después de registrar al usuario."
                 )
 
-            # Crear perfil en la tabla profiles si no existe
-            user_id = login_res.user.id
-            try:
-                supabase_client.table("profiles").insert({
-                    "id": user_id
-                }).execute()
-            except Exception as e:
-                print("Error al crear perfil:", e)
+        # La fila de profiles se crea en segundo plano (con reintentos) y, si falta, en la primera lectura del perfil
+        profile_provisioner.schedule(user.id, session.access_token)
 
-            return UserLoginResponse(
-                user=UserResponse(id=login_res.user.id, email=login_res.user.email),
-                session=Token(access_token=login_res.session.access_token, token_type=login_res.session.token_type)
-            )
-        
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No se pudo crear el usuario en este momento."
+        return UserLoginResponse(
+            user=UserResponse(id=user.id, email=user.email),
+            session=Token(access_token=session.access_token, token_type=session.token_type)
         )
 
     except AuthApiError as e:
@@ -77,6 +80,10 @@ def sign_up(user_create: UserCreate):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error de autenticación: {e.message}"
         )
+    except Overloaded as e:
+        raise e.as_http_exception()
+    except HTTPException:
+        raise
     except Exception:
         # Catch-all for any other unexpected errors
         raise HTTPException(
@@ -85,15 +92,16 @@ def sign_up(user_create: UserCreate):
         )
 
 @router.post("/login", response_model=UserLoginResponse)
-def login(user_login: UserCreate):
+async def login(user_login: UserCreate, supabase = Depends(get_supabase_auth_client)):
     """
     Authenticate a user and return a session token.
     """
     try:
-        res = supabase_client.auth.sign_in_with_password({
-            "email": user_login.email,
-            "password": user_login.password,
-        })
+        async with supabase_auth_limiter.slot():
+            res = await supabase.auth.sign_in_with_password({
+                "email": user_login.email,
+                "password": user_login.password,
+            })
 
         if res.user is None or res.session is None:
             # This case is often covered by AuthApiError, but it's a good safeguard.
@@ -113,6 +121,10 @@ def login(user_login: UserCreate):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Correo electrónico o contraseña no válidos."
         )
+    except Overloaded as e:
+        raise e.as_http_exception()
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, status
+from app.core.deps import require_admin
+from app.core.loop_watchdog import loop_watchdog
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_admin)])
+
+@router.get("/loop-stalls")
+async def read_loop_stalls():
+    """
+    Bloqueos del event loop detectados por el watchdog, agrupados por ruta y punto de llamada,
+    ordenados por tiempo total bloqueado, con la última pila muestreada de cada uno.
+    """
+    return loop_watchdog.report()
+
+@router.delete("/loop-stalls", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_loop_stalls():
+    """
+    Vacía el informe de bloqueos (las métricas acumuladas en /metrics no se reinician).
+    """
+    loop_watchdog.reset()
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/health")
+
+@router.get("/live", include_in_schema=False)
+async def liveness():
+    """
+    El proceso está vivo y su event loop responde. No consulta ningún servicio externo.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready", include_in_schema=False)
+async def readiness(request: Request):
+    """
+    Listo para recibir tráfico: clientes creados y precalentamiento terminado.
+    Responde 503 mientras arranca ("starting") y durante el apagado ("stopping").
+    """
+    state = getattr(request.app.state, "readiness", "starting")
+    if state != "ready":
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": state})
+    return {"status": state}
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from app.core.metrics import registry
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """
+    Process metrics in the Prometheus text exposition format.
+    """
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
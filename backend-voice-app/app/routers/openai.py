@@ -1,8 +1,23 @@
 from fastapi import APIRouter, Depends, Body, HTTPException, status
+from fastapi.responses import JSONResponse
+from app.core.admission import Overloaded, openai_limiter
+from app.core.catalog import CatalogSnapshot, topic_catalog
+from app.core.config import settings
 from app.core.deps import get_current_user
+from app.core.openai_client import get_openai_client
+from app.core.resilience import CircuitOpen, create_openai_sessions_caller
+from app.core.session_pool import create_session_pool
+from app.core.singleflight import SingleFlight
+from app.core.supabase import get_supabase_client
+from app.models.topic import TopicRead
+from dataclasses import dataclass
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
 import httpx
-from dotenv import load_dotenv
-import os
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -56,9 +71,6 @@ GENERAL_INSTRUCTIONS = """
   "El tema específico para la conversación de hoy es el siguiente:"
     """
 
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
 # Definición clara de las tools para OpenAI
 TOOLS = [
     {
@@ -111,49 +123,177 @@ TOOLS = [
     }
 ]
 
+REALTIME_MODEL = "gpt-4o-mini-realtime-preview-2024-12-17"
+REALTIME_VOICE = "shimmer"
+
+# Everything in the request body except the per-topic text is fixed, so it is encoded once:
+# '{"model": ..., "voice": ..., "tools": [...], "instructions": "<GENERAL_INSTRUCTIONS>\n\n**Tema:** '
+# and each request only JSON-escapes its own instructions and splices them in.
+_PAYLOAD_PREFIX = (
+    json.dumps({"model": REALTIME_MODEL, "voice": REALTIME_VOICE, "tools": TOOLS})[:-1]
+    + ', "instructions": '
+    + json.dumps(f"{GENERAL_INSTRUCTIONS}\n\n**Tema:** ")[:-1]
+).encode()
+
+def _encode_payload(instructions: str) -> bytes:
+    """JSON body for POST /realtime/sessions; same document as encoding the full dict."""
+    return _PAYLOAD_PREFIX + json.dumps(instructions)[1:].encode() + b"}"
+
+def _topic_instructions(topic: TopicRead) -> str:
+    if topic.difficulty_level:
+        return f"{topic.prompt_context}\n\n**Nivel del tema:** {topic.difficulty_level}"
+    return topic.prompt_context
+
+@dataclass(frozen=True)
+class _TopicPrompt:
+    instructions: str
+    digest: bytes
+    body: bytes
+
+class _TopicPromptCache:
+    """
+    Instructions, single-flight digest and encoded request body per topic,
+    built on first use and dropped whenever the catalog snapshot changes.
+    """
+
+    def __init__(self):
+        self._etag: Optional[str] = None
+        self._prompts: Dict[int, _TopicPrompt] = {}
+
+    def get(self, snapshot: CatalogSnapshot, topic_id: int) -> Optional[_TopicPrompt]:
+        if snapshot.etag != self._etag:
+            self._prompts = {}
+            self._etag = snapshot.etag
+        prompt = self._prompts.get(topic_id)
+        if prompt is None:
+            topic = snapshot.by_id.get(topic_id)
+            if topic is None:
+                return None
+            instructions = _topic_instructions(topic)
+            prompt = self._prompts[topic_id] = _TopicPrompt(
+                instructions=instructions,
+                digest=hashlib.sha256(instructions.encode()).digest(),
+                body=_encode_payload(instructions),
+            )
+        return prompt
+
+topic_prompts = _TopicPromptCache()
+
+async def _post_session(client: httpx.AsyncClient, body: bytes) -> httpx.Response:
+    async with openai_limiter.slot():
+        return await client.post("/realtime/sessions", content=body, headers={"Content-Type": "application/json"})
+
+async def _mint_session(instructions: str) -> dict:
+    """
+    Create a Realtime session for the warm pool. Raises unless OpenAI returned a client_secret.
+    """
+    body = _encode_payload(instructions)
+    # Background refills are not latency sensitive: retries and breaker, but no hedging
+    response = await openai_sessions.call(lambda: _post_session(get_openai_client(), body), hedge=False)
+    response.raise_for_status()
+    data = response.json()
+    if not data.get("client_secret"):
+        raise ValueError("Respuesta de OpenAI sin client_secret.")
+    return data
+
+# Retries, hedging and circuit breaking around POST /realtime/sessions
+openai_sessions = create_openai_sessions_caller(settings)
+
+# Pre-minted sessions for the hottest topics; started from the app lifespan when enabled.
+session_pool = create_session_pool(_mint_session, settings)
+
+# Double taps and retries for the same user and instructions share one upstream session.
+ephemeral_key_flights = SingleFlight(
+    "openai_ephemeral_key",
+    grace=settings.OPENAI_EPHEMERAL_KEY_GRACE,
+    cache_if=lambda result: result.get("success") is True,
+)
+
 @router.post("/openai/ephemeral-key")
 async def create_ephemeral_key(
     instructions: str = Body("", embed=True),
-    current_user: dict = Depends(get_current_user)
+    topic_id: Optional[int] = Body(None, embed=True),
+    current_user: dict = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_openai_client),
+    supabase = Depends(get_supabase_client)
 ):
-    print("DEBUG: Instrucciones recibidas ->", instructions) # Útil para depurar
     """
-    Crea una ephemeral key de OpenAI para la sesión de voz, usando instrucciones personalizadas.
+    Crea una ephemeral key de OpenAI para la sesión de voz, usando instrucciones personalizadas
+    o, si se envía `topic_id`, las instrucciones del tema (prompt_context y nivel) del catálogo.
     Devuelve un objeto consistente con ApiResult: éxito (client_secret), error de red, o error de OpenAI.
     """
-    final_instructions = f"{GENERAL_INSTRUCTIONS}\n\n**Tema:** {instructions}"
+    if topic_id is not None:
+        try:
+            catalog = await topic_catalog.get(supabase)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="No se pudieron recuperar los temas en este momento."
+            )
+        prompt = topic_prompts.get(catalog, topic_id)
+        if prompt is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="El tema no existe."
+            )
+        instructions, digest, body = prompt.instructions, prompt.digest, prompt.body
+    else:
+        digest = hashlib.sha256(instructions.encode()).digest()
+        body = None
+    # Solo la longitud: las instrucciones pueden contener datos del usuario
+    logger.debug("Instrucciones recibidas", extra={"instructions_chars": len(instructions), "topic_id": topic_id})
+    key = (current_user["user_id"], digest)
+    result = await ephemeral_key_flights.do(key, lambda: _create_session_result(instructions, client, body))
+    if "retry_after" in result:
+        # Rechazada por control de admisión: 503 con el mismo cuerpo ApiResult
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=result,
+            headers={"Retry-After": str(result["retry_after"])}
+        )
+    return result
 
-    payload = {
-        "model": "gpt-4o-mini-realtime-preview-2024-12-17",
-        "voice": "shimmer",
-        "instructions": final_instructions,
-        "tools": TOOLS,
-    }
+async def _create_session_result(instructions: str, client: httpx.AsyncClient, body: Optional[bytes] = None) -> dict:
+    pooled = session_pool.acquire(instructions)
+    if pooled is not None:
+        return {"success": True, "client_secret": pooled["client_secret"]}
+
+    if body is None:
+        body = _encode_payload(instructions)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/realtime/sessions",
-                headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
-                json=payload,
-                timeout=15
-            )
-            if response.status_code == 200:
-                data = response.json()
-                client_secret = data.get("client_secret")
-                if client_secret:
-                    return {"success": True, "client_secret": client_secret}
-                    
-                else:
-                    return {"success": False, "error": "Respuesta de OpenAI sin client_secret."}
+        # Shared keep-alive client: no new TCP/TLS handshake per session
+        response = await openai_sessions.call(lambda: _post_session(client, body))
+        if response.status_code == 200:
+            data = response.json()
+            client_secret = data.get("client_secret")
+            if client_secret:
+                return {"success": True, "client_secret": client_secret}
+                
             else:
-                # Intentar extraer mensaje de error de OpenAI
-                try:
-                    err_json = response.json()
-                    message = err_json.get("error", {}).get("message") or response.text
-                except Exception:
-                    message = response.text
-                return {"success": False, "error": f"OpenAI error: {message}", "status": response.status_code}
+                return {"success": False, "error": "Respuesta de OpenAI sin client_secret."}
+        else:
+            # Intentar extraer mensaje de error de OpenAI
+            try:
+                err_json = response.json()
+                message = err_json.get("error", {}).get("message") or response.text
+            except Exception:
+                message = response.text
+            return {"success": False, "error": f"OpenAI error: {message}", "status": response.status_code}
+    except Overloaded as e:
+        return {
+            "success": False,
+            "error": "OpenAI está saturado. Inténtalo de nuevo en unos segundos.",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "retry_after": e.retry_after,
+        }
+    except CircuitOpen as e:
+        return {
+            "success": False,
+            "error": "OpenAI no está disponible en este momento. Inténtalo de nuevo en unos segundos.",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "retry_after": e.retry_after,
+        }
     except httpx.RequestError as e:
         return {"success": False, "error": f"Error de red: {str(e)}"}
     except Exception as e:
-        return {"success": False, "error": f"Error inesperado: {str(e)}"} 
\ No newline at end of file
+        return {"success": False, "error": f"Error inesperado: {str(e)}"}
@@ -1,26 +1,59 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.core.deps import get_current_user
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.deps import get_current_user, oauth2_scheme
+from app.core.metrics import register_cache
+from app.core.profiles import ensure_profile
+from app.core.responses import trusted_response
 from app.models.user import ProfileRead, ProfileUpdate
-from app.core.supabase import supabase_client
+from app.core.supabase import get_supabase_client
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Read-through cache of `profiles` rows by user id; PATCH writes the returned row through.
+profile_cache: TTLCache[str, dict] = TTLCache(maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL)
+register_cache("profile", profile_cache)
+
+# Only ProfileRead's columns are read, cached or returned: the FAST_JSON_RESPONSES path
+# skips response_model filtering, so any other `profiles` column would reach the client.
+_PROFILE_COLUMNS = tuple(ProfileRead.model_fields)
+
+def _profile_row(row: dict) -> dict:
+    return {column: row.get(column) for column in _PROFILE_COLUMNS}
+
 @router.get("/me", response_model=ProfileRead)
-async def read_users_me(current_user: dict = Depends(get_current_user)):
+async def read_users_me(
+    current_user: dict = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
+    supabase = Depends(get_supabase_client)
+):
     """
-    Fetch the profile of the currently authenticated user.
+    Fetch the profile of the currently authenticated user, creating the row
+    if signup's background provisioning has not (yet) done it.
     """
+    user_id = current_user["user_id"]
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        return trusted_response(cached)
     try:
-        user_id = current_user["user_id"]
-        print(user_id)
-        res = supabase_client.table("profiles").select("*").eq("id", user_id).single().execute()
-        
-        if not res.data:
+        res = await supabase.table("profiles").select(",".join(_PROFILE_COLUMNS)).eq("id", user_id).limit(1).execute()
+        row = res.data[0] if res.data else None
+        if row is None:
+            row = await ensure_profile(supabase, user_id, token)
+
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No se pudo encontrar tu perfil."
             )
-        return res.data
+        row = _profile_row(row)
+        profile_cache.set(user_id, row)
+        return trusted_response(row)
+    except HTTPException:
+        raise
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -28,7 +61,11 @@ async def read_users_me(current_user: dict = Depends(get_current_user)):
         )
 
 @router.patch("/me", response_model=ProfileRead)
-async def update_user_me(profile_update: ProfileUpdate, current_user: dict = Depends(get_current_user)):
+async def update_user_me(
+    profile_update: ProfileUpdate,
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
     """
     Update the profile of the currently authenticated user.
     """
@@ -43,15 +80,20 @@ async def update_user_me(profile_update: ProfileUpdate, current_user: dict = Dep
                 detail="Proporciona al menos un campo para actualizar."
             )
 
-        res = supabase_client.table("profiles").update(update_data).eq("id", user_id).execute()
+        res = await supabase.table("profiles").update(update_data).eq("id", user_id).execute()
         
         if not res.data:
+            profile_cache.pop(user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No se encontró tu perfil para actualizar."
             )
         
-        return res.data[0]
+        row = _profile_row(res.data[0])
+        profile_cache.set(user_id, row)
+        return trusted_response(row)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
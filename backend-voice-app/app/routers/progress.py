@@ -1,36 +1,251 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.config import settings
 from app.core.deps import get_current_user
+from app.core.etag import etag_response, make_etag
+from app.core.pagination import after_cursor, decode_cursor, encode_cursor
+from app.core.progress_search import progress_search_index
+from app.core.progress_spool import progress_spool
+from app.core.progress_summary import progress_summaries
+from app.core.progress_views import record_progress
+from app.core.responses import dumps, trusted_response
 from app.core.supabase import get_supabase_client
-from app.models.progress import ProgressLog, ProgressLogCreate
+from app.models.progress import (
+    ProgressLog, ProgressLogBatch, ProgressLogBatchItem, ProgressLogBatchItemResult,
+    ProgressLogBatchResult, ProgressLogCreate, ProgressLogPartial, ProgressSearchResult, ProgressSummaryRead,
+)
 from postgrest import APIError
-from typing import List
+from pydantic import TypeAdapter, ValidationError
+from typing import AsyncIterator, List, Optional
+import asyncio
+import logging
+import sqlite3
+import zlib
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_logs_adapter = TypeAdapter(List[ProgressLog])
+_partial_logs_adapter = TypeAdapter(List[ProgressLogPartial])
+
+_LOG_COLUMNS = tuple(ProgressLog.model_fields)
+
+# Columns every projection keeps: the keyset cursor is built from them.
+_KEY_FIELDS = ("id", "session_date")
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in ProgressLog.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys([*_KEY_FIELDS, *requested]))
+
 @router.get("/progress", response_model=List[ProgressLog])
 async def get_user_progress_history(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PROGRESS_PAGE_MAX_LIMIT, description="Tamaño de página. Sin él se devuelve todo el historial."),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior."),
+    fields: Optional[str] = Query(None, description="Campos a devolver separados por comas; id y session_date siempre se incluyen."),
+    since: Optional[int] = Query(None, ge=0, description="Solo registros con id mayor a este (sincronización incremental)."),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
     supabase = Depends(get_supabase_client)
 ):
     """
-    Obtiene el historial de todos los registros de progreso para el usuario actual,
+    Obtiene el historial de registros de progreso para el usuario actual,
     ordenados del más reciente al más antiguo.
+
+    Admite paginación por cursor sobre (session_date, id), proyección de campos
+    con `fields=` y sincronización incremental con `since=`. La respuesta lleva
+    un ETag; si coincide con If-None-Match se responde 304 sin cuerpo.
     """
     user_id = current_user["user_id"]
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required")
-        
 
+    columns = _parse_fields(fields)
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
+
+    try:
+        query = supabase.table("progress_logs") \
+            .select(",".join(columns or _LOG_COLUMNS)) \
+            .eq("user_id", user_id)
+        if since is not None:
+            query = query.gt("id", since)
+        if position is not None:
+            query = after_cursor(query, position)
+        query = query.order("session_date", desc=True).order("id", desc=True)
+        if limit is not None:
+            # One extra row tells us whether another page exists.
+            query = query.limit(limit + 1)
+        result = await query.execute()
+
+    except APIError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la base de datos: {e.message}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Un error inesperado ocurrió: {str(e)}"
+        )
+
+    rows = result.data or []
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1]["session_date"], rows[-1]["id"])
+
+    if settings.FAST_JSON_RESPONSES:
+        # Rows come straight from our own table with only model columns selected.
+        body = dumps(rows)
+    elif columns:
+        body = _partial_logs_adapter.dump_json(_partial_logs_adapter.validate_python(rows), exclude_unset=True)
+    else:
+        body = _logs_adapter.dump_json(_logs_adapter.validate_python(rows))
+    return etag_response(body, make_etag(body), if_none_match, headers=headers)
+
+def _export_page_query(supabase, user_id: str, position, page_size: int):
+    query = supabase.table("progress_logs").select(",".join(_LOG_COLUMNS)).eq("user_id", user_id)
+    if position is not None:
+        query = after_cursor(query, position)
+    return query.order("session_date", desc=True).order("id", desc=True).limit(page_size).execute()
+
+def _encode_export_row(row: dict) -> bytes:
+    if settings.FAST_JSON_RESPONSES:
+        return dumps(row) + b"\n"
+    return ProgressLog.model_validate(row).model_dump_json().encode() + b"\n"
+
+async def _export_pages(supabase, user_id: str, first: List[dict], page_size: int, compress: bool) -> AsyncIterator[bytes]:
+    """
+    Yield the NDJSON export one page at a time. The next page is requested
+    while the current one is being sent, so at most two pages are in memory.
+    """
+    encoder = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+    rows: List[dict] = first
+    next_page: Optional[asyncio.Task] = None
     try:
-        # Seleccionar todos los registros donde user_id coincida y ordenar por fecha descendente
-        result = supabase.table("progress_logs") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .order("session_date", desc=True) \
-            .execute()
+        while rows:
+            if len(rows) == page_size:
+                last = rows[-1]
+                next_page = asyncio.create_task(
+                    _export_page_query(supabase, user_id, (last["session_date"], last["id"]), page_size)
+                )
+            chunk = b"".join(_encode_export_row(row) for row in rows)
+            if encoder is not None:
+                chunk = encoder.compress(chunk) + encoder.flush(zlib.Z_SYNC_FLUSH)
+            yield chunk
+            if next_page is None:
+                break
+            result, next_page = await next_page, None
+            rows = result.data or []
+        if encoder is not None:
+            yield encoder.flush()
+    except Exception:
+        # The status line is already sent: dropping the connection before the final
+        # chunk is how the client learns the export is incomplete.
+        logger.exception("Exportación de progreso interrumpida", extra={"user_id": user_id})
+        raise
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+@router.get("/progress/export")
+async def export_user_progress(
+    accept_encoding: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
+    """
+    Exporta el historial completo de progreso del usuario como NDJSON (un
+    registro por línea, del más reciente al más antiguo).
+
+    Se recorre la tabla por páginas con el mismo cursor que GET /progress y cada
+    página se envía en cuanto llega, así que la memoria no crece con el tamaño
+    del historial. Con `Accept-Encoding: gzip` el flujo se comprime.
+    """
+    user_id = current_user["user_id"]
+    page_size = settings.PROGRESS_EXPORT_PAGE_SIZE
+    try:
+        # The first page is read before the response starts so errors still get a proper status.
+        first = await _export_page_query(supabase, user_id, None, page_size)
+    except APIError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la base de datos: {e.message}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Un error inesperado ocurrió: {str(e)}"
+        )
 
-        return result.data
+    compress = _accepts_gzip(accept_encoding)
+    headers = {"Content-Disposition": 'attachment; filename="progress.ndjson"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _export_pages(supabase, user_id, first.data or [], page_size, compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+@router.get("/progress/search", response_model=ProgressSearchResult)
+async def search_user_progress(
+    q: str = Query(..., min_length=1, max_length=200, description="Palabras a buscar; cada una se compara como prefijo."),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
+    """
+    Busca en el vocabulario, los puntos gramaticales y sus ejemplos de todas las
+    sesiones del usuario ("past perf", "commute") y devuelve en qué sesiones aparecieron.
 
+    Sin distinguir mayúsculas ni acentos. Se responde desde un índice invertido
+    en memoria que se actualiza con cada registro nuevo.
+    """
+    try:
+        index = await progress_search_index.get(supabase, current_user["user_id"])
+    except APIError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la base de datos: {e.message}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Un error inesperado ocurrió: {str(e)}"
+        )
+    total, hits = index.search(q, limit)
+    return trusted_response({"query": q, "total": total, "hits": hits})
+
+@router.get("/progress/summary", response_model=ProgressSummaryRead)
+async def get_user_progress_summary(
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
+    """
+    Devuelve los totales del usuario (vocabulario, puntos gramaticales por estado,
+    evolución del nivel) a partir de agregados mantenidos incrementalmente.
+    """
+    try:
+        summary = await progress_summaries.get(supabase, current_user["user_id"])
     except APIError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -41,6 +256,7 @@ async def get_user_progress_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Un error inesperado ocurrió: {str(e)}"
         )
+    return summary.to_dict()
 
 @router.post("/progress", status_code=status.HTTP_201_CREATED)
 async def log_user_progress(
@@ -51,26 +267,30 @@ async def log_user_progress(
     """
     Registra el progreso de una sesión de tutoría para el usuario actual.
     """
-    # Crear el objeto ProgressLog completo con el user_id del usuario autenticado
-    full_data = ProgressLog(
-        user_id=current_user.get("user_id"),
-        **progress_data.model_dump()
-    )
+    # ProgressLogCreate ya está validado: se serializa una sola vez (fechas ISO) y se añade el dueño.
+    data_to_insert = progress_data.model_dump(mode="json")
+    data_to_insert['user_id'] = current_user["user_id"]
 
-    data_to_insert = full_data.model_dump(exclude_unset=True)
-    data_to_insert['user_id'] = str(data_to_insert['user_id'])
-    data_to_insert['session_date'] = data_to_insert['session_date'].isoformat().replace('+00:00', 'Z')
+    if settings.PROGRESS_WRITE_BEHIND and progress_spool.running:
+        try:
+            key = await progress_spool.append(current_user["user_id"], data_to_insert)
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"status": "queued", "idempotency_key": key}
+            )
+        except (OSError, sqlite3.Error):
+            # spool unavailable: fall back to the synchronous insert below
+            logger.warning("Spool de progreso no disponible; insertando directamente", exc_info=True)
 
-    print("user_id del token:", current_user.get("user_id"))
-    print("user_id en el registro:", full_data.user_id)
     try:
-        result = supabase.table("progress_logs").insert(data_to_insert).execute()
+        result = await supabase.table("progress_logs").insert(data_to_insert).execute()
         if not result.data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No se pudo registrar el progreso. La base de datos no devolvió datos."
             )
-        return result.data[0]
+        record_progress(current_user["user_id"], result.data)
+        return trusted_response(result.data[0], status_code=status.HTTP_201_CREATED)
     except APIError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -81,3 +301,78 @@ async def log_user_progress(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Un error inesperado ocurrió: {str(e)}"
         )
+
+@router.post("/progress/batch", response_model=ProgressLogBatchResult)
+async def log_user_progress_batch(
+    batch: ProgressLogBatch,
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
+    """
+    Registra varias sesiones de una vez (p. ej. al reconectar tras practicar sin conexión).
+
+    Cada registro se valida por separado y los válidos se guardan con un único insert.
+    Los registros con un idempotency_key ya guardado se reportan como 'duplicate'
+    en lugar de duplicarse, así que reintentar la subida completa es seguro.
+    """
+    user_id = current_user["user_id"]
+
+    results: List[ProgressLogBatchItemResult] = []
+    rows: List[dict] = []
+    pending: List[ProgressLogBatchItemResult] = []
+    seen_keys = set()
+    for index, raw in enumerate(batch.items):
+        try:
+            item = ProgressLogBatchItem.model_validate(raw)
+        except ValidationError as e:
+            results.append(ProgressLogBatchItemResult(
+                index=index, status="invalid",
+                errors=e.errors(include_url=False, include_context=False, include_input=False),
+            ))
+            continue
+        result = ProgressLogBatchItemResult(index=index, status="created", idempotency_key=item.idempotency_key)
+        results.append(result)
+        if item.idempotency_key is not None:
+            if item.idempotency_key in seen_keys:
+                result.status = "duplicate"
+                continue
+            seen_keys.add(item.idempotency_key)
+        row = item.model_dump(mode="json")
+        row["user_id"] = user_id
+        rows.append(row)
+        pending.append(result)
+
+    if rows:
+        try:
+            # ON CONFLICT (user_id, idempotency_key) DO NOTHING: only new rows come back.
+            inserted = await supabase.table("progress_logs") \
+                .upsert(rows, on_conflict="user_id,idempotency_key", ignore_duplicates=True) \
+                .execute()
+        except APIError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error en la base de datos: {e.message}"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Un error inesperado ocurrió: {str(e)}"
+            )
+        created_rows = inserted.data or []
+        by_key = {row["idempotency_key"]: row for row in created_rows if row.get("idempotency_key")}
+        # Rows without a key are never skipped, so they come back in request order.
+        unkeyed = iter(row for row in created_rows if not row.get("idempotency_key"))
+        for result in pending:
+            row = by_key.get(result.idempotency_key) if result.idempotency_key else next(unkeyed, None)
+            if row is None:
+                result.status = "duplicate"
+            else:
+                result.id = row.get("id")
+        record_progress(user_id, created_rows)
+
+    return ProgressLogBatchResult(
+        created=sum(result.status == "created" for result in results),
+        duplicates=sum(result.status == "duplicate" for result in results),
+        invalid=sum(result.status == "invalid" for result in results),
+        items=results,
+    )
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.core.deps import get_current_user
+from app.core.responses import trusted_response
+from app.core.review_schedule import review_instructions, review_schedules
+from app.core.supabase import get_supabase_client
+from app.models.review import ReviewNextRead
+from postgrest import APIError
+
+router = APIRouter()
+
+@router.get("/review/next", response_model=ReviewNextRead)
+async def get_next_review(
+    limit: int = Query(5, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
+    """
+    Devuelve los puntos gramaticales y el vocabulario del usuario cuyo repaso
+    está más atrasado, junto con un bloque de instrucciones para la siguiente
+    sesión de voz.
+
+    Cada sesión registrada reprograma lo que toca: 'needs_review' lo devuelve
+    al día siguiente y cada práctica correcta duplica el intervalo.
+    """
+    try:
+        schedule = await review_schedules.get(supabase, current_user["user_id"])
+    except APIError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la base de datos: {e.message}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Un error inesperado ocurrió: {str(e)}"
+        )
+    items = schedule.due(datetime.now(timezone.utc), limit)
+    return trusted_response({
+        "items": [item.to_dict() for item in items],
+        "instructions": review_instructions(items),
+    })
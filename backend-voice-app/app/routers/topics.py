@@ -1,55 +1,102 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.core.deps import get_current_user
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from app.core.cache import TTLCache
+from app.core.catalog import topic_catalog
+from app.core.config import settings
+from app.core.deps import get_current_user, require_admin
+from app.core.etag import etag_response
 from app.models.topic import TopicRead
-from app.core.supabase import supabase_client
-from typing import List
+from app.core.metrics import register_cache
+from app.core.responses import trusted_response
+from app.core.supabase import get_supabase_client
+from typing import FrozenSet, List, Optional
 
 router = APIRouter()
 
+# Topic ids each user has completed, kept write-through on completion.
+completed_topics_cache: TTLCache[str, FrozenSet[int]] = TTLCache(
+    maxsize=settings.COMPLETED_TOPICS_CACHE_SIZE, ttl=settings.COMPLETED_TOPICS_CACHE_TTL
+)
+register_cache("completed_topics", completed_topics_cache)
+
+def _mark_completed(user_id: str, topic_id: int) -> None:
+    completed = completed_topics_cache.peek(user_id)
+    if completed is not None and topic_id not in completed:
+        completed_topics_cache.set(user_id, completed | {topic_id})
+
+async def _completed_topic_ids(supabase, user_id: str) -> FrozenSet[int]:
+    completed = completed_topics_cache.get(user_id)
+    if completed is None:
+        res = await supabase.table("user_progress").select("topic_id").eq("user_id", user_id).execute()
+        completed = frozenset(row["topic_id"] for row in res.data or [])
+        completed_topics_cache.set(user_id, completed)
+    return completed
+
 @router.get("/topics", response_model=List[TopicRead])
-async def read_topics(current_user: dict = Depends(get_current_user)):
+async def read_topics(
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
     """
     Retrieve a list of all available topics.
+    Served from the in-process catalog; answers 304 when If-None-Match matches.
     """
     try:
-        res = supabase_client.table("topics").select("*").execute()
-        return res.data
+        catalog = await topic_catalog.get(supabase)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="No se pudieron recuperar los temas en este momento."
         )
+    return etag_response(catalog.body, catalog.etag, if_none_match)
+
+@router.post("/topics/cache/invalidate", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
+async def invalidate_topics_cache():
+    """
+    Drop the cached topic catalog so the next read reloads it from the database.
+    """
+    topic_catalog.invalidate()
 
 @router.post("/topics/{topic_id}/complete", status_code=status.HTTP_201_CREATED)
-async def complete_topic(topic_id: int, current_user: dict = Depends(get_current_user)):
+async def complete_topic(
+    topic_id: int,
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
     """
     Mark a specific topic as completed for the current user.
+    The topic is checked against the cached catalog, so this costs a single insert.
     """
+    user_id = current_user["user_id"]
     try:
-        user_id = current_user["user_id"]
-        
-        # 1. Verify the topic exists to provide a clear error message.
-        topic_res = supabase_client.table("topics").select("id").eq("id", topic_id).single().execute()
-        if not topic_res.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="El tema seleccionado no existe."
-            )
+        catalog = await topic_catalog.get(supabase)
+        known_topic = topic_id in catalog.by_id
 
-        # 2. Insert the progress record.
+        # The foreign key on user_progress.topic_id still catches ids missing from
+        # the database; an id the catalog does not know yet just means it is stale.
         progress_data = {"user_id": user_id, "topic_id": topic_id}
-        supabase_client.table("user_progress").insert(progress_data).execute()
+        await supabase.table("user_progress").insert(progress_data).execute()
+        _mark_completed(user_id, topic_id)
+        if not known_topic:
+            topic_catalog.invalidate()
 
         return {"message": "Tema marcado como completado exitosamente."}
 
     except Exception as e:
+        code = getattr(e, 'code', None)
         # Handle unique constraint violation (user already completed the topic).
-        if hasattr(e, 'code') and e.code == '23505': # unique_violation for PostgreSQL
+        if code == '23505': # unique_violation for PostgreSQL
+            _mark_completed(user_id, topic_id)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Ya has completado este tema."
             )
+        if code == '23503': # foreign_key_violation: the topic does not exist
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="El tema seleccionado no existe."
+            )
         # Handle other potential database or application errors.
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -57,15 +104,23 @@ async def complete_topic(topic_id: int, current_user: dict = Depends(get_current
         )
 
 @router.get("/topics/completed", response_model=List[TopicRead])
-async def get_completed_topics(current_user: dict = Depends(get_current_user)):
+async def get_completed_topics(
+    current_user: dict = Depends(get_current_user),
+    supabase = Depends(get_supabase_client)
+):
     """
     Get a list of topics completed by the current user.
+    Joins the user's cached completed ids with the cached topic catalog.
     """
     try:
         user_id = current_user["user_id"]
-        # Call the RPC function to get completed topics.
-        res = supabase_client.rpc('get_completed_topics', {'p_user_id': user_id}).execute()
-        return res.data if res.data else []
+        completed = await _completed_topic_ids(supabase, user_id)
+        catalog = await topic_catalog.get(supabase)
+        if not completed.issubset(catalog.by_id):
+            # A topic newer than our catalog copy: reload it once.
+            topic_catalog.invalidate()
+            catalog = await topic_catalog.get(supabase)
+        return trusted_response([catalog.json_rows[topic.id] for topic in catalog.topics if topic.id in completed])
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,72 @@
+"""Helpers to run local stand-in servers inside a benchmark process."""
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+import uvicorn
+
+# The app's Settings require these; benchmarks never talk to a real project.
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-anon-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-jwt-secret")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def self_signed_cert() -> Optional[Tuple[str, str]]:
+    """Create a throwaway localhost certificate with the openssl CLI, if present."""
+    if shutil.which("openssl") is None:
+        return None
+    directory = tempfile.mkdtemp(prefix="bench-tls-")
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", keyfile, "-out", certfile, "-days", "1",
+            "-subj", "/CN=localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certfile, keyfile
+
+class ServerThread:
+    """Run an ASGI app with uvicorn on a background thread."""
+
+    def __init__(self, app, port: Optional[int] = None, tls: Optional[Tuple[str, str]] = None):
+        self.port = port or free_port()
+        self.tls = tls
+        config = uvicorn.Config(
+            app,
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            ssl_certfile=tls[0] if tls else None,
+            ssl_keyfile=tls[1] if tls else None,
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ServerThread":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,65 @@
+"""
+Compare a fresh httpx.AsyncClient per call (the old create_ephemeral_key
+behaviour) with the shared keep-alive client against a local fake OpenAI.
+
+    python -m benchmarks.bench_openai_client --requests 200 --tls
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks import _server  # sets placeholder Settings env before app imports
+
+from app.core.openai_client import build_openai_client
+from benchmarks.fake_openai import create_fake_openai_app
+
+PAYLOAD = {"model": "gpt-4o-mini-realtime-preview-2024-12-17", "voice": "shimmer", "instructions": "x" * 4000}
+
+async def per_call(base_url: str, verify: bool, n: int):
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(verify=verify) as client:
+            response = await client.post(f"{base_url}/v1/realtime/sessions", json=PAYLOAD, timeout=15)
+            response.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+async def shared(base_url: str, verify: bool, n: int):
+    timings = []
+    async with build_openai_client(base_url=f"{base_url}/v1", verify=verify) as client:
+        for _ in range(n):
+            start = time.perf_counter()
+            response = await client.post("/realtime/sessions", json=PAYLOAD)
+            response.raise_for_status()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def summary(name: str, timings):
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{name:>10}: mean {statistics.mean(timings) * 1000:7.2f} ms  "
+          f"p50 {statistics.median(timings) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected server latency in seconds")
+    parser.add_argument("--tls", action="store_true", help="Serve over TLS with a self-signed cert")
+    args = parser.parse_args()
+
+    tls = _server.self_signed_cert() if args.tls else None
+    if args.tls and tls is None:
+        print("openssl not found; falling back to plain HTTP")
+    with _server.ServerThread(create_fake_openai_app(args.latency), tls=tls) as server:
+        cold = asyncio.run(per_call(server.url, verify=False, n=args.requests))
+        warm = asyncio.run(shared(server.url, verify=False, n=args.requests))
+    summary("per-call", cold)
+    summary("shared", warm)
+    print(f"saved per call: {(statistics.mean(cold) - statistics.mean(warm)) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
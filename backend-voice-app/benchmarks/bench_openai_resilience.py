@@ -0,0 +1,99 @@
+"""
+Realtime session creation against a fake OpenAI that injects slow responses
+and errors: one plain attempt vs. retries vs. retries + hedging, then a full
+outage to show the circuit breaker failing fast.
+
+    python -m benchmarks.bench_openai_resilience --requests 400 --slow-rate 0.05 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks import _server  # sets placeholder Settings env before app imports
+
+from app.core.openai_client import build_openai_client
+from app.core.resilience import CircuitBreaker, CircuitOpen, ResilientCaller
+from benchmarks.fake_openai import create_fake_openai_app
+from benchmarks.load_test import percentile
+
+PAYLOAD = {"model": "gpt-4o-mini-realtime-preview-2024-12-17", "voice": "shimmer", "instructions": "x" * 2000}
+
+def make_caller(max_attempts: int, hedge: bool, hedge_min_delay: float) -> ResilientCaller:
+    breaker = CircuitBreaker("bench", window=20, min_calls=10, failure_ratio=0.5, reset_timeout=2.0)
+    return ResilientCaller(
+        "bench",
+        breaker=breaker,
+        max_attempts=max_attempts,
+        backoff_base=0.05,
+        backoff_max=0.5,
+        hedge=hedge,
+        hedge_quantile=0.95,
+        hedge_min_delay=hedge_min_delay,
+        hedge_max_delay=2.0,
+        min_samples=20,
+    )
+
+async def run(base_url: str, caller: ResilientCaller, requests: int, concurrency: int):
+    timings, failures, fast_failures = [], 0, 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with build_openai_client(base_url=f"{base_url}/v1") as client:
+        async def one():
+            nonlocal failures, fast_failures
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await caller.call(lambda: client.post("/realtime/sessions", json=PAYLOAD))
+                    ok = response.status_code == 200
+                except CircuitOpen:
+                    ok = False
+                    fast_failures += 1
+                except httpx.HTTPError:
+                    ok = False
+                timings.append(time.perf_counter() - start)
+                failures += not ok
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+    return sorted(timings), failures, fast_failures
+
+def report(name: str, timings, failures: int, fast_failures: int, upstream_requests: int, requests: int):
+    p50, p95, p99 = (percentile(timings, p) * 1000 for p in (50, 95, 99))
+    print(
+        f"{name:>16}: p50 {p50:8.1f} ms  p95 {p95:8.1f} ms  p99 {p99:8.1f} ms  "
+        f"failed {failures:4d} ({fast_failures} fast)  upstream calls {upstream_requests / requests:.2f}x"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.1, help="Normal response time in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--hedge-min-delay", type=float, default=0.15)
+    args = parser.parse_args()
+
+    policies = [
+        ("single attempt", make_caller(1, hedge=False, hedge_min_delay=args.hedge_min_delay)),
+        ("retries", make_caller(3, hedge=False, hedge_min_delay=args.hedge_min_delay)),
+        ("retries + hedge", make_caller(3, hedge=True, hedge_min_delay=args.hedge_min_delay)),
+    ]
+    fake = create_fake_openai_app(
+        args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency, error_rate=args.error_rate, seed=1
+    )
+    with _server.ServerThread(fake) as server:
+        for name, caller in policies:
+            fake.state.requests = 0
+            timings, failures, fast = asyncio.run(run(server.url, caller, args.requests, args.concurrency))
+            report(name, timings, failures, fast, fake.state.requests, args.requests)
+
+        print("\nfull outage (every response is 500):")
+        fake.state.error_rate, fake.state.slow_rate, fake.state.requests = 1.0, 0.0, 0
+        caller = make_caller(3, hedge=True, hedge_min_delay=args.hedge_min_delay)
+        timings, failures, fast = asyncio.run(run(server.url, caller, args.requests, args.concurrency))
+        report("breaker", timings, failures, fast, fake.state.requests, args.requests)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of returning a large List[ProgressLog] through FastAPI's response_model
+(validate the rows, dump them to JSON-compatible Python, json.dumps) versus the
+FAST_JSON_RESPONSES path that encodes the database rows directly.
+
+    python -m benchmarks.bench_serialization --rows 2000
+"""
+import argparse
+import json
+import os
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+
+# The app's Settings require these; nothing here talks to Supabase.
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-anon-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "benchmark-jwt-secret")
+
+from app.core.responses import dumps, orjson
+from app.models.progress import ProgressLog
+
+def make_rows(count: int) -> List[dict]:
+    user_id = str(uuid.uuid4())
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": i,
+            "user_id": user_id,
+            "session_date": (start + timedelta(hours=i)).isoformat(),
+            "duration_minutes": 15,
+            "topics_discussed": ["travel", "work", "food"],
+            "new_vocabulary": [f"word-{i}-{j}" for j in range(8)],
+            "grammar_points": [
+                {"point": "Past Perfect", "examples": ["I had gone", "She had seen"], "status": "needs_review"},
+                {"point": "Conditionals", "examples": ["If I were you"], "status": "practiced"},
+            ],
+            "ai_summary": "The learner kept a steady pace and corrected most mistakes. " * 6,
+            "suggested_level": "B1",
+        }
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[ProgressLog])
+
+    def response_model_path():
+        # What FastAPI does for `response_model=List[ProgressLog]` + JSONResponse.
+        validated = adapter.validate_python(rows)
+        return json.dumps(adapter.dump_python(validated, mode="json"), ensure_ascii=False).encode()
+
+    def validated_dump_json():
+        return adapter.dump_json(adapter.validate_python(rows))
+
+    def trusted_path():
+        return dumps(rows)
+
+    print(f"{args.rows} rows, encoder: {'orjson' if orjson else 'json'}")
+    baseline = None
+    for name, fn in (("response_model", response_model_path), ("validate+dump_json", validated_dump_json), ("trusted", trusted_path)):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:>20}: {best * 1000:8.2f} ms  ({baseline / best:5.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Signup latency against local GoTrue/PostgREST stand-ins with injected
+latency: the previous three-call pipeline (sign up, sign in, insert the
+profile) vs. the current POST /auth/signup, which takes the session from the
+sign-up response and creates the profile row in the background. After the
+run the provisioner is drained and every new account is checked for a
+profile row.
+
+    python -m benchmarks.bench_signup --signups 200 --concurrency 10 --latency 0.03
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import httpx
+
+from benchmarks import _server  # sets placeholder Settings env before app imports
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.load_test import JWT_SECRET, percentile
+
+async def legacy_signup(auth, data, email: str, password: str) -> None:
+    """The pre-collapse pipeline, call for call."""
+    await auth.auth.sign_up({"email": email, "password": password, "options": {"email_confirm": False}})
+    login = await auth.auth.sign_in_with_password({"email": email, "password": password})
+    await data.table("profiles").insert({"id": login.user.id}).execute()
+
+async def run(name: str, signup, signups: int, concurrency: int):
+    timings, failures = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    run_id = uuid.uuid4().hex[:8]
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await signup(f"{name}-{run_id}-{i}@bench.local", "benchmark-password")
+            except Exception:
+                failures += 1
+            timings.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(signups)))
+    return sorted(timings), failures
+
+def report(name: str, timings, failures: int, upstream_requests: int, signups: int):
+    p50, p95, p99 = (percentile(timings, p) * 1000 for p in (50, 95, 99))
+    print(
+        f"{name:>10}: p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  "
+        f"failed {failures:3d}  upstream calls {upstream_requests / signups:.2f}/signup"
+    )
+
+async def bench(fake: FakeSupabase, args) -> None:
+    from app.core.profiles import profile_provisioner
+    from app.core.supabase import close_supabase_client, get_supabase_auth_client, get_supabase_client, init_supabase_client
+    from app.main import app
+
+    await init_supabase_client()
+    try:
+        auth, data = get_supabase_auth_client(), get_supabase_client()
+        fake.requests = 0
+        timings, failures = await run(
+            "legacy", lambda email, password: legacy_signup(auth, data, email, password), args.signups, args.concurrency
+        )
+        report("legacy", timings, failures, fake.requests, args.signups)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client:
+            async def collapsed(email: str, password: str) -> None:
+                response = await client.post("/auth/signup", json={"email": email, "password": password})
+                response.raise_for_status()
+
+            profiles_before = len(fake.tables["profiles"])
+            fake.requests = 0
+            timings, failures = await run("collapsed", collapsed, args.signups, args.concurrency)
+            report("collapsed", timings, failures, fake.requests, args.signups)
+
+            drain_start = time.perf_counter()
+            await profile_provisioner.stop(timeout=30.0)
+            created = len(fake.tables["profiles"]) - profiles_before
+            print(
+                f"\nprofiles created in the background: {created}/{args.signups - failures} "
+                f"(drained {(time.perf_counter() - drain_start) * 1000:.1f} ms after the last response)"
+            )
+    finally:
+        await close_supabase_client()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.03, help="Stand-in latency per request in seconds")
+    args = parser.parse_args()
+
+    fake = FakeSupabase(latency=args.latency, jwt_secret=JWT_SECRET)
+    with _server.ServerThread(fake.app) as server:
+        os.environ.update(SUPABASE_URL=server.url, SUPABASE_JWT_SECRET=JWT_SECRET)
+        asyncio.run(bench(fake, args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Cold-start cost of the app, each run in a fresh interpreter: `import
+app.main`, `create_app()`, lifespan startup until /health/ready, and the
+first and second authenticated GET /topics against local Supabase/OpenAI
+stand-ins. Runs once with PREWARM_ENABLED off and once with it on, and
+writes JSON so import/startup time can be tracked across commits:
+
+    python -m benchmarks.bench_startup --runs 7 --supabase-latency 0.03
+    python -m benchmarks.bench_startup --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks import _server
+from benchmarks.fake_openai import create_fake_openai_app
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.load_test import APP_DIR, JWT_SECRET, RESULTS_DIR, _delta, git_revision
+
+# Runs in the child before anything else is imported, so the import timing is honest.
+CHILD = """
+import time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+import asyncio, json, os
+import httpx
+
+async def measure():
+    timings = {"import_ms": (imported - started) * 1000}
+    start = time.perf_counter()
+    application = app.main.create_app()
+    timings["create_app_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    async with application.router.lifespan_context(application):
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            while (await client.get("/health/ready")).status_code != 200:
+                await asyncio.sleep(0.001)
+            timings["ready_ms"] = (time.perf_counter() - start) * 1000
+            headers = {"Authorization": "Bearer " + os.environ["BENCH_TOKEN"]}
+            for name in ("first_request_ms", "second_request_ms"):
+                start = time.perf_counter()
+                (await client.get("/topics", headers=headers)).raise_for_status()
+                timings[name] = (time.perf_counter() - start) * 1000
+    print("RESULT " + json.dumps(timings))
+
+asyncio.run(measure())
+"""
+
+METRICS = ("process_ms", "import_ms", "create_app_ms", "ready_ms", "first_request_ms", "second_request_ms")
+
+def run_child(env: dict) -> dict:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", CHILD], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    timings = next(
+        json.loads(line[len("RESULT "):]) for line in completed.stdout.splitlines() if line.startswith("RESULT ")
+    )
+    timings["process_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per configuration")
+    parser.add_argument("--supabase-latency", type=float, default=0.03, help="Injected seconds per Supabase request")
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/startup-<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to print deltas against")
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    fake = FakeSupabase(latency=args.supabase_latency, jwt_secret=JWT_SECRET)
+    fake.seed(users=1, topics=args.topics)
+    token = fake.token_for(FakeSupabase.user_id(0), FakeSupabase.user_email(0))
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "python": sys.version.split()[0],
+        "config": vars(args),
+        "configurations": {},
+    }
+    with _server.ServerThread(fake.app) as supabase, _server.ServerThread(create_fake_openai_app()) as openai:
+        base_env = dict(
+            os.environ,
+            SUPABASE_URL=supabase.url,
+            SUPABASE_JWT_SECRET=JWT_SECRET,
+            OPENAI_BASE_URL=f"{openai.url}/v1",
+            LOG_LEVEL="WARNING",
+            BENCH_TOKEN=token,
+        )
+        for name, prewarm in (("cold", "false"), ("prewarm", "true")):
+            runs = [run_child({**base_env, "PREWARM_ENABLED": prewarm}) for _ in range(args.runs)]
+            results["configurations"][name] = {
+                metric: round(statistics.median(run[metric] for run in runs), 2) for metric in METRICS
+            }
+
+    print(f"median of {args.runs} fresh interpreters, Supabase latency {args.supabase_latency * 1000:.0f} ms")
+    print(f"  {'':<10}" + "".join(f"{metric[:-3]:>16}" for metric in METRICS))
+    for name, medians in results["configurations"].items():
+        print(f"  {name:<10}" + "".join(f"{medians[metric]:>13.1f} ms" for metric in METRICS))
+        old = (baseline or {}).get("configurations", {}).get(name)
+        if old:
+            print(f"  {'  vs base':<10}" + "".join(f"{_delta(old[metric], medians[metric]):>16}" for metric in METRICS))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"startup-{stamp}-{results['git']['commit'][:8] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Local stand-in for the OpenAI Realtime sessions endpoint."""
+import asyncio
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+def create_fake_openai_app(
+    latency: float = 0.0,
+    *,
+    slow_rate: float = 0.0,
+    slow_latency: float = 5.0,
+    error_rate: float = 0.0,
+    error_status: int = 500,
+    seed: int = 0,
+) -> FastAPI:
+    """
+    Answer POST /v1/realtime/sessions like OpenAI does, after `latency` seconds.
+
+    Faults for resilience tests: a `slow_rate` fraction of requests take
+    `slow_latency` seconds instead, and an `error_rate` fraction answer
+    `error_status` with OpenAI's error body. All of these live on `app.state`
+    and can be changed while the server runs.
+    """
+    app = FastAPI()
+    app.state.latency = latency
+    app.state.slow_rate = slow_rate
+    app.state.slow_latency = slow_latency
+    app.state.error_rate = error_rate
+    app.state.error_status = error_status
+    app.state.rng = random.Random(seed)
+    app.state.requests = 0
+    app.state.errors = 0
+    app.state.slow = 0
+
+    @app.post("/v1/realtime/sessions")
+    async def create_session(request: Request):
+        await request.body()
+        state = app.state
+        state.requests += 1
+        delay = state.latency
+        if state.slow_rate and state.rng.random() < state.slow_rate:
+            state.slow += 1
+            delay = state.slow_latency
+        if delay:
+            await asyncio.sleep(delay)
+        if state.error_rate and state.rng.random() < state.error_rate:
+            state.errors += 1
+            return JSONResponse(
+                status_code=state.error_status,
+                content={"error": {"message": "The server had an error while processing your request.", "type": "server_error"}},
+            )
+        return {
+            "id": f"sess_{uuid.uuid4().hex}",
+            "object": "realtime.session",
+            "model": "gpt-4o-mini-realtime-preview-2024-12-17",
+            "client_secret": {
+                "value": f"ek_{uuid.uuid4().hex}",
+                "expires_at": int(time.time()) + 60,
+            },
+        }
+
+    return app
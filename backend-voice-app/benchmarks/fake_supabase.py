@@ -0,0 +1,343 @@
+"""
+Local stand-in for the parts of Supabase the app uses: PostgREST (/rest/v1)
+and GoTrue password auth (/auth/v1). Implements just enough of the query
+language for the app's own queries (eq/neq/gt/gte/lt/lte/in/is, or/and,
+order, limit, offset, select, upserts with ignore-duplicates) plus the
+unique and foreign-key errors the routers translate into 409/404.
+"""
+import asyncio
+import itertools
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from fastapi import FastAPI, Request, Response
+from jose import jwt
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+BENCH_PASSWORD = "benchmark-password"
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    return value
+
+def _coerce(stored, raw: str):
+    """Parse a filter operand as the type of the stored column value."""
+    if isinstance(stored, bool):
+        return raw == "true"
+    if isinstance(stored, int):
+        return int(raw)
+    if isinstance(stored, float):
+        return float(raw)
+    if isinstance(stored, str):
+        return _as_datetime(raw)
+    return raw
+
+_COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+def _condition(column: str, op: str, raw: str) -> Predicate:
+    raw = raw.strip('"')
+
+    def check(row: Row) -> bool:
+        value = row.get(column)
+        if op == "in":
+            return str(value) in [item.strip('"') for item in raw.strip("()").split(",")]
+        if op == "is":
+            return value is None if raw == "null" else value == (raw == "true")
+        if value is None:
+            return False
+        try:
+            return _COMPARISONS[op](_as_datetime(value), _coerce(value, raw))
+        except (TypeError, ValueError):
+            return False
+
+    return check
+
+def _split_top_level(expression: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def _logic(expression: str) -> Predicate:
+    """'and(a.eq.1,or(b.lt.2,c.is.null))' -> predicate."""
+    match = re.match(r"^(and|or)\((.*)\)$", expression)
+    if match:
+        parts = [_logic(part) for part in _split_top_level(match.group(2))]
+        combine = all if match.group(1) == "and" else any
+        return lambda row: combine(part(row) for part in parts)
+    column, op, raw = expression.split(".", 2)
+    return _condition(column, op, raw)
+
+def _error(status: int, code: str, message: str) -> Response:
+    body = {"code": code, "message": message, "details": None, "hint": None}
+    return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+def _auth_error(status: int, error_code: str, message: str) -> Response:
+    body = {"code": status, "error_code": error_code, "msg": message}
+    return Response(json.dumps(body), status_code=status, media_type="application/json")
+
+class FakeSupabase:
+    """
+    In-memory tables behind a FastAPI app (`.app`). Every request waits
+    `latency` seconds first; set `fail_writes` to make REST writes return 503.
+    """
+
+    unique = {
+        "profiles": [("id",)],
+        "user_progress": [("user_id", "topic_id")],
+        "progress_logs": [("user_id", "idempotency_key")],
+    }
+    foreign_keys = {"user_progress": ("topic_id", "topics", "id")}
+
+    def __init__(self, latency: float = 0.0, jwt_secret: str = "benchmark-jwt-secret"):
+        self.latency = latency
+        self.jwt_secret = jwt_secret
+        self.fail_writes = False
+        self.tables: Dict[str, List[Row]] = {"topics": [], "profiles": [], "user_progress": [], "progress_logs": []}
+        self.users: Dict[str, Dict[str, str]] = {}
+        self.requests = 0
+        self._ids = itertools.count(1)
+        self.app = self._build_app()
+
+    # -- seeding ---------------------------------------------------------
+
+    @staticmethod
+    def user_id(index: int) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"bench-user-{index}"))
+
+    @staticmethod
+    def user_email(index: int) -> str:
+        return f"bench-user-{index}@example.com"
+
+    def seed(self, users: int, topics: int = 20, logs_per_user: int = 0) -> None:
+        """Deterministic dataset: the same arguments always produce the same rows."""
+        self.tables["topics"] = [
+            {
+                "id": topic_id,
+                "title": f"Topic {topic_id}",
+                "description": f"Conversation practice #{topic_id}",
+                "prompt_context": "Talk about everyday situations. " * 40,
+                "difficulty_level": ["A2", "B1", "B2", "C1"][topic_id % 4],
+                "created_at": "2024-01-01T00:00:00+00:00",
+            }
+            for topic_id in range(1, topics + 1)
+        ]
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        log_id = itertools.count(1)
+        for index in range(users):
+            user_id = self.user_id(index)
+            email = self.user_email(index)
+            self.users[user_id] = {"email": email, "password": BENCH_PASSWORD}
+            self.tables["profiles"].append(
+                {"id": user_id, "name": f"User {index}", "profile_picture_url": None, "english_level": "B1"}
+            )
+            for i in range(logs_per_user):
+                self.tables["progress_logs"].append({
+                    "id": next(log_id),
+                    "user_id": user_id,
+                    "session_date": (base + timedelta(hours=i)).isoformat(),
+                    "created_at": (base + timedelta(hours=i)).isoformat(),
+                    "duration_minutes": 10 + i % 20,
+                    "topics_discussed": [f"Topic {1 + i % max(topics, 1)}"],
+                    "new_vocabulary": [f"word{i % 50}", f"phrase{i % 13}"],
+                    "grammar_points": [{
+                        "point": ["Past Perfect", "Present Simple", "Conditionals"][i % 3],
+                        "examples": [f"Example sentence {i}"],
+                        "status": "needs_review" if i % 4 == 0 else "practiced",
+                    }],
+                    "ai_summary": "The learner practised describing past events. " * 5,
+                    "suggested_level": ["A2", "B1", "B2"][i % 3],
+                })
+        self._ids = itertools.count(next(log_id))
+
+    # -- auth ------------------------------------------------------------
+
+    def token_for(self, user_id: str, email: str, ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {"sub": user_id, "email": email, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + ttl}
+        return jwt.encode(claims, self.jwt_secret, algorithm="HS256")
+
+    def _session(self, user_id: str, email: str) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        user = {
+            "id": user_id, "aud": "authenticated", "role": "authenticated", "email": email,
+            "app_metadata": {}, "user_metadata": {}, "identities": [], "created_at": now, "updated_at": now,
+        }
+        return {
+            "access_token": self.token_for(user_id, email),
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "expires_at": int(time.time()) + 3600,
+            "refresh_token": uuid.uuid4().hex,
+            "user": user,
+        }
+
+    # -- PostgREST -------------------------------------------------------
+
+    @staticmethod
+    def _filter(request: Request, rows: List[Row]) -> List[Row]:
+        for key, value in request.query_params.multi_items():
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                continue
+            if key in ("or", "and"):
+                predicate = _logic(key + value)
+            else:
+                op, raw = value.split(".", 1)
+                predicate = _condition(key, op, raw)
+            rows = [row for row in rows if predicate(row)]
+        return rows
+
+    @staticmethod
+    def _shape(request: Request, rows: List[Row]) -> List[Row]:
+        order = request.query_params.get("order")
+        if order:
+            for part in reversed(order.split(",")):
+                column, *modifiers = part.split(".")
+                rows = sorted(
+                    rows,
+                    key=lambda row: (row.get(column) is None, _as_datetime(row.get(column))),
+                    reverse="desc" in modifiers,
+                )
+        offset = int(request.query_params.get("offset", 0))
+        limit = request.query_params.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+        select = request.query_params.get("select", "*")
+        if select != "*":
+            columns = select.split(",")
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows
+
+    @staticmethod
+    def _respond(request: Request, rows: List[Row], status: int = 200) -> Response:
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                return _error(406, "PGRST116", "JSON object requested, multiple (or no) rows returned")
+            return Response(json.dumps(rows[0], default=str), status_code=status, media_type="application/json")
+        return Response(json.dumps(rows, default=str), status_code=status, media_type="application/json")
+
+    def _insert(self, table: str, items: List[Row], ignore_duplicates: bool) -> List[Row]:
+        rows = self.tables.setdefault(table, [])
+        created: List[Row] = []
+        for item in items:
+            item = dict(item)
+            foreign_key = self.foreign_keys.get(table)
+            if foreign_key:
+                column, target, target_column = foreign_key
+                if not any(row[target_column] == item.get(column) for row in self.tables[target]):
+                    raise _Conflict("23503", "insert or update violates foreign key constraint")
+            duplicate = any(
+                all(item.get(c) is not None for c in columns)
+                and any(all(row.get(c) == item.get(c) for c in columns) for row in itertools.chain(rows, created))
+                for columns in self.unique.get(table, [])
+            )
+            if duplicate:
+                if ignore_duplicates:
+                    continue
+                raise _Conflict("23505", "duplicate key value violates unique constraint")
+            if table != "profiles":
+                item.setdefault("id", next(self._ids))
+            if table == "progress_logs":
+                item.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+            created.append(item)
+        rows.extend(created)
+        return created
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+        fake = self
+
+        @app.middleware("http")
+        async def inject_latency(request: Request, call_next):
+            fake.requests += 1
+            if fake.latency:
+                await asyncio.sleep(fake.latency)
+            if fake.fail_writes and request.method != "GET" and request.url.path.startswith("/rest/"):
+                return _error(503, "PGRST000", "database unavailable")
+            return await call_next(request)
+
+        @app.post("/auth/v1/signup")
+        async def sign_up(request: Request):
+            body = await request.json()
+            if any(user["email"] == body["email"] for user in fake.users.values()):
+                return _auth_error(422, "user_already_exists", "User already registered")
+            user_id = str(uuid.uuid4())
+            fake.users[user_id] = {"email": body["email"], "password": body["password"]}
+            return fake._session(user_id, body["email"])
+
+        @app.post("/auth/v1/token")
+        async def token(request: Request):
+            body = await request.json()
+            for user_id, user in fake.users.items():
+                if user["email"] == body.get("email") and user["password"] == body.get("password"):
+                    return fake._session(user_id, user["email"])
+            return _auth_error(400, "invalid_credentials", "Invalid login credentials")
+
+        @app.get("/rest/v1/{table}")
+        async def select(table: str, request: Request):
+            rows = fake._filter(request, list(fake.tables.get(table, [])))
+            return fake._respond(request, fake._shape(request, rows))
+
+        @app.post("/rest/v1/rpc/{function}")
+        async def rpc(function: str, request: Request):
+            body = await request.json()
+            if function == "get_completed_topics":
+                ids = {row["topic_id"] for row in fake.tables["user_progress"] if row["user_id"] == body["p_user_id"]}
+                return [topic for topic in fake.tables["topics"] if topic["id"] in ids]
+            return _error(404, "PGRST202", f"function {function} not found")
+
+        @app.post("/rest/v1/{table}")
+        async def insert(table: str, request: Request):
+            body = await request.json()
+            prefer = request.headers.get("prefer", "")
+            try:
+                created = fake._insert(table, body if isinstance(body, list) else [body], "ignore-duplicates" in prefer)
+            except _Conflict as e:
+                return _error(409, e.code, e.message)
+            if "return=representation" in prefer:
+                return fake._respond(request, created, 201)
+            return Response(status_code=201)
+
+        @app.patch("/rest/v1/{table}")
+        async def update(table: str, request: Request):
+            body = await request.json()
+            rows = fake._filter(request, fake.tables.get(table, []))
+            for row in rows:
+                row.update(body)
+            return fake._respond(request, rows)
+
+        return app
+
+class _Conflict(Exception):
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
@@ -0,0 +1,365 @@
+"""
+End-to-end load test of the real app against local Supabase and OpenAI
+stand-ins with injected latency.
+
+The stand-ins run in one child process and the app (uvicorn app.main:app) in
+another, so neither competes with the load generator for the GIL. Each
+scenario drives `--concurrency` virtual users for `--duration` seconds after
+a warm-up and reports throughput plus p50/p95/p99 per route. Results are
+written as JSON so runs can be compared across commits:
+
+    python -m benchmarks.load_test --duration 20 --concurrency 32 --supabase-latency 0.03
+    python -m benchmarks.load_test --scenarios progress --env FAST_JSON_RESPONSES=true \\
+        --compare benchmarks/results/<previous>.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import _server
+from benchmarks.fake_supabase import BENCH_PASSWORD, FakeSupabase
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(APP_DIR, "benchmarks", "results")
+JWT_SECRET = "benchmark-jwt-secret"
+PERCENTILES = (50, 95, 99)
+
+# -- processes -------------------------------------------------------------
+
+def _serve_stand_ins(supabase_port: int, openai_port: int, args: dict, ready) -> None:
+    from benchmarks.fake_openai import create_fake_openai_app
+
+    fake = FakeSupabase(latency=args["supabase_latency"], jwt_secret=JWT_SECRET)
+    fake.seed(users=args["users"], topics=args["topics"], logs_per_user=args["logs_per_user"])
+    with _server.ServerThread(fake.app, port=supabase_port), \
+            _server.ServerThread(create_fake_openai_app(args["openai_latency"]), port=openai_port):
+        ready.set()
+        while True:
+            time.sleep(3600)
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+def start_app(port: int, supabase_url: str, openai_url: str, overrides: Dict[str, str], spool_dir: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        SUPABASE_URL=supabase_url,
+        SUPABASE_KEY="benchmark-anon-key",
+        SUPABASE_JWT_SECRET=JWT_SECRET,
+        OPENAI_API_KEY="sk-benchmark",
+        OPENAI_BASE_URL=f"{openai_url}/v1",
+        PROGRESS_SPOOL_PATH=os.path.join(spool_dir, "progress_spool.sqlite3"),
+    )
+    env.update(overrides)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR,
+        env=env,
+    )
+    try:
+        _wait_until_up(f"http://127.0.0.1:{port}/")
+    except Exception:
+        process.terminate()
+        raise
+    return process
+
+# -- workloads -------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.enabled = False
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - start
+        if self.enabled:
+            self.timings[route].append(elapsed)
+            if response is None or response.status_code >= 400 or _is_api_failure(response):
+                self.errors[route] += 1
+        return response
+
+def _is_api_failure(response: httpx.Response) -> bool:
+    # /openai/ephemeral-key reports upstream failures as 200 + ApiResult
+    if response.url.path != "/openai/ephemeral-key":
+        return False
+    try:
+        return response.json().get("success") is not True
+    except ValueError:
+        return True
+
+class VirtualUser:
+    def __init__(self, index: int, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, topics: int):
+        self.index = index
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.topics = topics
+        self.headers: Dict[str, str] = {}
+
+    @property
+    def credentials(self) -> dict:
+        return {"email": FakeSupabase.user_email(self.index), "password": BENCH_PASSWORD}
+
+    async def sign_in(self) -> None:
+        response = await self.client.post("/auth/login", json=self.credentials)
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['session']['access_token']}"}
+
+    async def login(self) -> None:
+        await self.recorder.request(self.client, "POST /auth/login", "POST", "/auth/login", json=self.credentials)
+
+    async def topics(self) -> None:
+        await self.recorder.request(self.client, "GET /topics", "GET", "/topics", headers=self.headers)
+
+    async def profile(self) -> None:
+        await self.recorder.request(self.client, "GET /profile/me", "GET", "/profile/me", headers=self.headers)
+
+    async def progress(self) -> None:
+        # First page, then the next one through the cursor, as the app's history screen does
+        response = await self.recorder.request(
+            self.client, "GET /progress?limit", "GET", "/progress", params={"limit": 20}, headers=self.headers
+        )
+        cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+        if cursor:
+            await self.recorder.request(
+                self.client, "GET /progress?cursor", "GET", "/progress",
+                params={"limit": 20, "cursor": cursor}, headers=self.headers,
+            )
+        await self.recorder.request(self.client, "GET /progress/summary", "GET", "/progress/summary", headers=self.headers)
+
+    async def progress_full(self) -> None:
+        await self.recorder.request(self.client, "GET /progress", "GET", "/progress", headers=self.headers)
+
+    async def ephemeral_key(self) -> None:
+        topic = self.rng.randint(1, self.topics)
+        await self.recorder.request(
+            self.client, "POST /openai/ephemeral-key", "POST", "/openai/ephemeral-key",
+            json={"instructions": f"Practice conversation about topic {topic}."}, headers=self.headers,
+        )
+
+Step = Callable[[VirtualUser], Awaitable[None]]
+
+# scenario -> [(weight, step)]; a virtual user picks one step per iteration
+SCENARIOS: Dict[str, List[Tuple[float, Step]]] = {
+    "login": [(1, VirtualUser.login)],
+    "topics": [(1, VirtualUser.topics)],
+    "profile": [(1, VirtualUser.profile)],
+    "progress": [(1, VirtualUser.progress)],
+    "progress_full": [(1, VirtualUser.progress_full)],
+    "ephemeral_key": [(1, VirtualUser.ephemeral_key)],
+    "mixed": [
+        (0.05, VirtualUser.login),
+        (0.25, VirtualUser.topics),
+        (0.25, VirtualUser.profile),
+        (0.30, VirtualUser.progress),
+        (0.15, VirtualUser.ephemeral_key),
+    ],
+}
+DEFAULT_SCENARIOS = ("login", "topics", "profile", "progress", "ephemeral_key", "mixed")
+
+async def run_scenario(base_url: str, name: str, args) -> dict:
+    steps = SCENARIOS[name]
+    weights = [weight for weight, _ in steps]
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        users = [
+            VirtualUser(i % args.users, client, recorder, random.Random(args.seed * 1000 + i), args.topics)
+            for i in range(args.concurrency)
+        ]
+        await asyncio.gather(*(user.sign_in() for user in users))
+
+        async def drive(user: VirtualUser, until: float) -> None:
+            while time.monotonic() < until:
+                _, step = user.rng.choices(steps, weights)[0]
+                await step(user)
+
+        await asyncio.gather(*(drive(user, time.monotonic() + args.warmup) for user in users))
+        recorder.enabled = True
+        start = time.monotonic()
+        await asyncio.gather(*(drive(user, start + args.duration) for user in users))
+        elapsed = time.monotonic() - start
+        recorder.enabled = False
+
+    routes = {route: summarize(timings, recorder.errors[route], elapsed) for route, timings in sorted(recorder.timings.items())}
+    total = sum(len(timings) for timings in recorder.timings.values())
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def summarize(timings: List[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(timings)
+    summary = {
+        "count": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(ordered, p) * 1000, 3)
+    return summary
+
+# -- reporting -------------------------------------------------------------
+
+def git_revision() -> dict:
+    def git(*argv: str) -> str:
+        return subprocess.run(["git", *argv], cwd=APP_DIR, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+def print_results(results: dict, baseline: Optional[dict]) -> None:
+    for scenario, data in results["scenarios"].items():
+        line = f"\n{scenario}: {data['throughput_rps']:.1f} req/s, {data['requests']} requests, {data['errors']} errors"
+        before = (baseline or {}).get("scenarios", {}).get(scenario)
+        if before:
+            line += f" (baseline {before['throughput_rps']:.1f} req/s, {_delta(before['throughput_rps'], data['throughput_rps'])})"
+        print(line)
+        print(f"  {'route':<28} {'count':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for route, stats in data["routes"].items():
+            print(
+                f"  {route:<28} {stats['count']:>7} {stats['errors']:>5} "
+                f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+            )
+            old = before["routes"].get(route) if before else None
+            if old:
+                print(
+                    f"  {'  vs baseline':<28} {'':>7} {'':>5} "
+                    + " ".join(f"{_delta(old[f'p{p}_ms'], stats[f'p{p}_ms']):>9}" for p in PERCENTILES)
+                )
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+def parse_overrides(pairs: List[str]) -> Dict[str, str]:
+    overrides = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--env expects KEY=VALUE, got {pair!r}")
+        overrides[key] = value
+    return overrides
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS), help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+    parser.add_argument("--users", type=int, default=50, help="Seeded accounts the virtual users log in as")
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--logs-per-user", type=int, default=200)
+    parser.add_argument("--supabase-latency", type=float, default=0.02, help="Injected seconds per Supabase request")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Injected seconds per Realtime session")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="App setting override, repeatable")
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to print deltas against")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    if args.users < 1:
+        parser.error("--users must be at least 1")
+    overrides = parse_overrides(args.env)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    supabase_port, openai_port, app_port = _server.free_port(), _server.free_port(), _server.free_port()
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    stand_ins = context.Process(
+        target=_serve_stand_ins,
+        args=(supabase_port, openai_port, {
+            "supabase_latency": args.supabase_latency,
+            "openai_latency": args.openai_latency,
+            "users": args.users,
+            "topics": args.topics,
+            "logs_per_user": args.logs_per_user,
+        }, ready),
+        daemon=True,
+    )
+    stand_ins.start()
+    app = None
+    try:
+        if not ready.wait(60):
+            raise RuntimeError("stand-in servers did not start")
+        with tempfile.TemporaryDirectory(prefix="bench-app-") as spool_dir:
+            app = start_app(
+                app_port, f"http://127.0.0.1:{supabase_port}", f"http://127.0.0.1:{openai_port}", overrides, spool_dir
+            )
+            base_url = f"http://127.0.0.1:{app_port}"
+            results_by_scenario = {}
+            for name in scenarios:
+                print(f"running {name} for {args.duration:.0f}s ...", flush=True)
+                results_by_scenario[name] = asyncio.run(run_scenario(base_url, name, args))
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait(timeout=10)
+        stand_ins.terminate()
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "env")},
+        "env_overrides": overrides,
+        "scenarios": results_by_scenario,
+    }
+    print_results(results, baseline)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{results['git']['commit'][:8] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {output}")
+
+if __name__ == "__main__":
+    main()